@@ -1,9 +1,14 @@
 """
 API Response Models - Lightweight versions for frontend
+
+These models document the /query payload. The internal QueryResponse is
+serialized straight into this shape with QUERY_RESPONSE_INCLUDE.
 """
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import List, Optional, Tuple
+from pydantic import BaseModel
 from datetime import datetime
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 
 from backend.models.knowledge_schema import DocType, Jurisdiction, DocumentVersion
 
@@ -15,7 +20,7 @@ class DocumentMetadata(BaseModel):
     file_path: str
     doctype: DocType
     jurisdiction: Jurisdiction
-    parties: List[str] = Field(default_factory=list)
+    parties: Tuple[str, ...] = ()
     effective_date: Optional[datetime] = None
     version: DocumentVersion = DocumentVersion.DRAFT
     total_pages: int
@@ -25,7 +30,7 @@ class ChunkMetadata(BaseModel):
     """Lightweight chunk metadata for API responses"""
     chunk_id: str
     text: str
-    section_path: List[str] = Field(default_factory=list)
+    section_path: Tuple[str, ...] = ()
     section_title: Optional[str] = None
     page_start: Optional[int] = None
     page_end: Optional[int] = None
@@ -47,7 +52,7 @@ class SearchResultResponse(BaseModel):
     final_score: float = 0.0
 
     # Highlights
-    match_highlights: List[str] = Field(default_factory=list)
+    match_highlights: Tuple[str, ...] = ()
 
 
 class QueryResponseAPI(BaseModel):
@@ -69,69 +74,61 @@ class QueryResponseAPI(BaseModel):
     total_time_ms: float
 
 
-def convert_to_api_response(internal_response) -> QueryResponseAPI:
+# Field names carried over from the internal models (computed once at import)
+_CHUNK_FIELDS = tuple(ChunkMetadata.model_fields)
+_DOC_FIELDS = tuple(DocumentMetadata.model_fields)
+
+# Serialization mask that shapes an internal QueryResponse into QueryResponseAPI.
+# Heavy internal fields (embedding_vector, full_text, chunks, section_tree, ...)
+# are skipped at serialization time instead of copying into lightweight models.
+RESULT_INCLUDE = {
+    **{field: True for field in SearchResultResponse.model_fields},
+    "chunk": set(_CHUNK_FIELDS),
+    "document": set(_DOC_FIELDS),
+}
+QUERY_RESPONSE_INCLUDE = {
+    **{field: True for field in QueryResponseAPI.model_fields},
+    "results": {"__all__": RESULT_INCLUDE},
+}
+# Everything but the results list (trailing event of /query/stream)
+QUERY_SUMMARY_INCLUDE = {
+    field: True for field in QueryResponseAPI.model_fields if field != "results"
+}
+
+
+class PydanticResponse(JSONResponse):
     """
-    Convert internal QueryResponse to lightweight API response
+    JSON response that serializes a pydantic model directly
 
-    Args:
-        internal_response: QueryResponse from knowledge_schema
+    Skips FastAPI's jsonable_encoder pass and response_model re-validation;
+    pydantic-core writes the JSON bytes in one go. An optional include mask
+    (e.g. QUERY_RESPONSE_INCLUDE) limits which fields are written.
 
-    Returns:
-        QueryResponseAPI with lightweight models
+    Use ``await PydanticResponse.create(...)`` for large payloads so the
+    serialization runs in a worker thread instead of on the event loop.
     """
-    from backend.models.knowledge_schema import SearchResult, QueryResponse
-
-    results = []
-    for result in internal_response.results:
-        # Extract only needed chunk metadata
-        chunk_meta = ChunkMetadata(
-            chunk_id=result.chunk.chunk_id,
-            text=result.chunk.text,
-            section_path=result.chunk.section_path,
-            section_title=result.chunk.section_title,
-            page_start=result.chunk.page_start,
-            page_end=result.chunk.page_end,
-            is_header=result.chunk.is_header,
-            is_definition=result.chunk.is_definition,
-            contains_dates=result.chunk.contains_dates,
-            contains_money=result.chunk.contains_money
-        )
-
-        # Extract only needed document metadata
-        doc_meta = DocumentMetadata(
-            doc_id=result.document.doc_id,
-            title=result.document.title,
-            file_path=result.document.file_path,
-            doctype=result.document.doctype,
-            jurisdiction=result.document.jurisdiction,
-            parties=result.document.parties,
-            effective_date=result.document.effective_date,
-            version=result.document.version,
-            total_pages=result.document.total_pages
-        )
-
-        # Create lightweight search result
-        api_result = SearchResultResponse(
-            chunk=chunk_meta,
-            document=doc_meta,
-            bm25_score=result.bm25_score,
-            vector_score=result.vector_score,
-            metadata_boost=result.metadata_boost,
-            final_score=result.final_score,
-            match_highlights=result.match_highlights
-        )
-
-        results.append(api_result)
-
-    # Create API response
-    return QueryResponseAPI(
-        original_query=internal_response.original_query,
-        results=results,
-        total_found=internal_response.total_found,
-        summary=internal_response.summary,
-        confidence=internal_response.confidence,
-        disclaimer=internal_response.disclaimer,
-        search_time_ms=internal_response.search_time_ms,
-        generation_time_ms=internal_response.generation_time_ms,
-        total_time_ms=internal_response.total_time_ms
-    )
+
+    def __init__(self, content: BaseModel, include: Optional[dict] = None, **kwargs):
+        self.include = include
+        super().__init__(content, **kwargs)
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            # Already rendered by create()
+            return content
+        return self._dump(content, self.include)
+
+    @staticmethod
+    def _dump(content: BaseModel, include: Optional[dict]) -> bytes:
+        return content.model_dump_json(include=include).encode("utf-8")
+
+    @classmethod
+    async def create(
+        cls,
+        content: BaseModel,
+        include: Optional[dict] = None,
+        **kwargs
+    ) -> "PydanticResponse":
+        """Build the response, rendering the JSON body in a worker thread"""
+        body = await run_in_threadpool(cls._dump, content, include)
+        return cls(body, include=include, **kwargs)
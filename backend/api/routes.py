@@ -1,9 +1,14 @@
 """
 API routes - Updated for new architecture
 """
+import queue
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, Iterable
+
+import orjson
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
 from backend.api.schemas import (
     QueryRequest,
@@ -11,7 +16,13 @@ from backend.api.schemas import (
     IndexingRequest,
     StatusResponse
 )
-from backend.api.response_models import QueryResponseAPI, convert_to_api_response
+from backend.api.response_models import (
+    QueryResponseAPI,
+    PydanticResponse,
+    RESULT_INCLUDE,
+    QUERY_RESPONSE_INCLUDE,
+    QUERY_SUMMARY_INCLUDE
+)
 from backend.config import settings
 from backend.services.security import EULAService
 from backend.services.legal_ai_service import LegalAIService
@@ -19,38 +30,52 @@ from backend.utils.logger import setup_logger, AuditLogger
 
 logger = setup_logger(__name__)
 
-# Initialize services (will be set in main.py)
-legal_ai_service: LegalAIService = None
-eula_service: EULAService = None
-audit_logger: AuditLogger = None
-
 router = APIRouter()
 
+# Pre-serialized bodies for static endpoints
+_ROOT_BODY = orjson.dumps({
+    "app": settings.APP_NAME,
+    "version": settings.APP_VERSION,
+    "status": "running"
+})
+_eula_bodies: Dict[bool, bytes] = {}  # accepted -> /eula body
 
-def init_services(
-    ai_svc: LegalAIService,
-    eula_svc: EULAService,
-    audit_log: AuditLogger
-):
-    """Initialize services"""
-    global legal_ai_service, eula_service, audit_logger
-    legal_ai_service = ai_svc
-    eula_service = eula_svc
-    audit_logger = audit_log
+# Items encoded per chunk when streaming JSON arrays
+_STREAM_BATCH_SIZE = 100
+
+
+# Services live on app.state (set in main.py) and are injected per endpoint
+def get_legal_ai_service(request: Request) -> LegalAIService:
+    """Dependency: the application's LegalAIService"""
+    return request.app.state.legal_ai_service
+
+
+def get_eula_service(request: Request) -> EULAService:
+    """Dependency: the application's EULAService"""
+    return request.app.state.eula_service
+
+
+def get_audit_logger(request: Request) -> AuditLogger:
+    """Dependency: the application's AuditLogger"""
+    return request.app.state.audit_logger
+
+
+def get_index_queue(request: Request) -> queue.Queue:
+    """Dependency: queue feeding the persistent indexing worker"""
+    return request.app.state.index_queue
 
 
 @router.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "app": settings.APP_NAME,
-        "version": settings.APP_VERSION,
-        "status": "running"
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
-@router.get("/status", response_model=StatusResponse)
-async def get_status():
+@router.get("/status", responses={200: {"model": StatusResponse}})
+async def get_status(
+    legal_ai_service: LegalAIService = Depends(get_legal_ai_service),
+    eula_service: EULAService = Depends(get_eula_service)
+):
     """Get system status"""
     # Check if service is ready
     stats = legal_ai_service.get_stats()
@@ -60,27 +85,42 @@ async def get_status():
     total_documents = indexer_stats.get("total_documents", 0)
     total_chunks = indexer_stats.get("total_chunks", 0)
 
-    return StatusResponse(
-        status="ready" if (eula_service.is_eula_accepted() and stats["is_ready"]) else "awaiting_eula",
-        eula_accepted=eula_service.is_eula_accepted(),
-        total_documents=total_documents,
-        total_chunks=total_chunks,
-        knowledge_base_loaded=(total_documents > 0 and stats["is_ready"])
-    )
+    eula_accepted = eula_service.is_eula_accepted()
+
+    # Trusted values: return the StatusResponse shape without re-validation
+    return ORJSONResponse({
+        "status": "ready" if (eula_accepted and stats["is_ready"]) else "awaiting_eula",
+        "eula_accepted": eula_accepted,
+        "total_documents": total_documents,
+        "total_chunks": total_chunks,
+        "knowledge_base_loaded": (total_documents > 0 and stats["is_ready"])
+    })
 
 
 @router.get("/eula")
-async def get_eula():
+async def get_eula(
+    eula_service: EULAService = Depends(get_eula_service)
+):
     """Get EULA text"""
-    return {
-        "version": settings.EULA_VERSION,
-        "text": eula_service.get_eula_text(),
-        "accepted": eula_service.is_eula_accepted()
-    }
+    accepted = eula_service.is_eula_accepted()
+
+    body = _eula_bodies.get(accepted)
+    if body is None:
+        body = _eula_bodies[accepted] = orjson.dumps({
+            "version": settings.EULA_VERSION,
+            "text": eula_service.get_eula_text(),
+            "accepted": accepted
+        })
+
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/eula/accept")
-async def accept_eula(request: EULAAcceptRequest):
+async def accept_eula(
+    request: EULAAcceptRequest,
+    eula_service: EULAService = Depends(get_eula_service),
+    audit_logger: AuditLogger = Depends(get_audit_logger)
+):
     """Accept EULA"""
     if not request.accepted:
         raise HTTPException(status_code=400, detail="EULA must be accepted")
@@ -98,7 +138,8 @@ async def accept_eula(request: EULAAcceptRequest):
 @router.post("/index")
 async def start_indexing(
     request: IndexingRequest,
-    background_tasks: BackgroundTasks
+    eula_service: EULAService = Depends(get_eula_service),
+    index_queue: queue.Queue = Depends(get_index_queue)
 ):
     """Start document indexing"""
     if not eula_service.is_eula_accepted():
@@ -114,11 +155,8 @@ async def start_indexing(
         logger.error(f"Directory does not exist: {doc_dir}")
         raise HTTPException(status_code=404, detail=f"Directory not found: {doc_dir}")
 
-    # Run indexing in background
-    background_tasks.add_task(
-        _run_indexing,
-        doc_dir
-    )
+    # Hand off to the indexing worker (jobs run one at a time, in order)
+    index_queue.put(doc_dir)
 
     return {
         "status": "indexing_started",
@@ -126,8 +164,31 @@ async def start_indexing(
     }
 
 
-def _run_indexing(doc_dir: Path):
-    """Background task for indexing"""
+def run_index_worker(
+    index_queue: queue.Queue,
+    legal_ai_service: LegalAIService,
+    audit_logger: AuditLogger
+):
+    """
+    Persistent indexing worker (runs in a daemon thread started by main.py)
+
+    Jobs are processed sequentially, so two folders never index concurrently
+    against the same knowledge base.
+    """
+    while True:
+        doc_dir = index_queue.get()
+        try:
+            _run_indexing(legal_ai_service, audit_logger, doc_dir)
+        finally:
+            index_queue.task_done()
+
+
+def _run_indexing(
+    legal_ai_service: LegalAIService,
+    audit_logger: AuditLogger,
+    doc_dir: Path
+):
+    """Run one indexing job"""
     try:
         logger.info(f"Starting indexing: {doc_dir}")
         result = legal_ai_service.index_documents(doc_dir)
@@ -150,7 +211,10 @@ def _run_indexing(doc_dir: Path):
 
 
 @router.get("/index/stats")
-async def get_index_stats():
+async def get_index_stats(
+    legal_ai_service: LegalAIService = Depends(get_legal_ai_service),
+    eula_service: EULAService = Depends(get_eula_service)
+):
     """Get indexing statistics"""
     if not eula_service.is_eula_accepted():
         raise HTTPException(status_code=403, detail="EULA must be accepted first")
@@ -159,27 +223,35 @@ async def get_index_stats():
 
     # Flatten for frontend compatibility
     indexer_stats = stats.get("indexer", {})
-    return {
+    return ORJSONResponse({
         "total_documents": indexer_stats.get("total_documents", 0),
         "total_chunks": indexer_stats.get("total_chunks", 0),
         "faiss_vectors": indexer_stats.get("faiss_vectors", 0),
         "is_ready": stats.get("is_ready", False),
-    }
+    })
 
 
 @router.get("/documents")
-async def get_documents():
+async def get_documents(
+    legal_ai_service: LegalAIService = Depends(get_legal_ai_service),
+    eula_service: EULAService = Depends(get_eula_service)
+):
     """Get list of indexed documents"""
     if not eula_service.is_eula_accepted():
         raise HTTPException(status_code=403, detail="EULA must be accepted first")
 
-    return {
-        "documents": legal_ai_service.get_document_list()
-    }
+    return StreamingResponse(
+        _stream_json_array("documents", legal_ai_service.iter_document_list()),
+        media_type="application/json"
+    )
 
 
 @router.get("/documents/{doc_id}")
-async def get_document_details(doc_id: str):
+async def get_document_details(
+    doc_id: str,
+    legal_ai_service: LegalAIService = Depends(get_legal_ai_service),
+    eula_service: EULAService = Depends(get_eula_service)
+):
     """Get detailed information about a document"""
     if not eula_service.is_eula_accepted():
         raise HTTPException(status_code=403, detail="EULA must be accepted first")
@@ -192,18 +264,51 @@ async def get_document_details(doc_id: str):
 
 
 @router.get("/folders")
-async def get_indexed_folders():
+async def get_indexed_folders(
+    legal_ai_service: LegalAIService = Depends(get_legal_ai_service),
+    eula_service: EULAService = Depends(get_eula_service)
+):
     """Get list of indexed document folders"""
     if not eula_service.is_eula_accepted():
         raise HTTPException(status_code=403, detail="EULA must be accepted first")
 
-    return {
-        "folders": legal_ai_service.folder_manager.get_folders()
-    }
+    return StreamingResponse(
+        _stream_json_array("folders", legal_ai_service.folder_manager.get_folders()),
+        media_type="application/json"
+    )
+
+
+async def _stream_json_array(key: str, items: Iterable) -> AsyncIterator[bytes]:
+    """
+    Stream {"<key>": [item, ...]} without building the whole body in memory
+
+    Items are orjson-encoded and flushed in batches of _STREAM_BATCH_SIZE.
+    """
+    yield b"{" + orjson.dumps(key) + b":["
+
+    batch = []
+    first = True
+    for item in items:
+        encoded = orjson.dumps(item)
+        batch.append(encoded if first else b"," + encoded)
+        first = False
+
+        if len(batch) >= _STREAM_BATCH_SIZE:
+            yield b"".join(batch)
+            batch = []
+
+    if batch:
+        yield b"".join(batch)
+
+    yield b"]}"
 
 
 @router.delete("/folders/{folder_path:path}")
-async def remove_indexed_folder(folder_path: str):
+async def remove_indexed_folder(
+    folder_path: str,
+    legal_ai_service: LegalAIService = Depends(get_legal_ai_service),
+    eula_service: EULAService = Depends(get_eula_service)
+):
     """Remove a folder from the indexed list"""
     if not eula_service.is_eula_accepted():
         raise HTTPException(status_code=403, detail="EULA must be accepted first")
@@ -216,13 +321,21 @@ async def remove_indexed_folder(folder_path: str):
 
 
 @router.get("/health")
-async def health_check():
+async def health_check(
+    legal_ai_service: LegalAIService = Depends(get_legal_ai_service)
+):
     """Health check endpoint"""
-    return legal_ai_service.health_check()
+    # Depends on live service state, so encode directly rather than cache
+    return ORJSONResponse(legal_ai_service.health_check())
 
 
-@router.post("/query", response_model=QueryResponseAPI)
-async def query(request: QueryRequest):
+@router.post("/query", responses={200: {"model": QueryResponseAPI}})
+async def query(
+    request: QueryRequest,
+    legal_ai_service: LegalAIService = Depends(get_legal_ai_service),
+    eula_service: EULAService = Depends(get_eula_service),
+    audit_logger: AuditLogger = Depends(get_audit_logger)
+):
     """Process search query"""
     if not eula_service.is_eula_accepted():
         raise HTTPException(status_code=403, detail="EULA must be accepted first")
@@ -234,15 +347,16 @@ async def query(request: QueryRequest):
         )
 
     try:
-        # Get internal response
-        internal_response = legal_ai_service.query(request.query)
-
-        # Convert to lightweight API response
-        api_response = convert_to_api_response(internal_response)
+        # Get internal response (blocking search runs off the event loop)
+        internal_response = await run_in_threadpool(legal_ai_service.query, request.query)
 
-        audit_logger.log_search(request.query, len(api_response.results))
+        audit_logger.log_search(request.query, len(internal_response.results))
 
-        return api_response
+        # Serialize straight into the lightweight API shape, also off the loop
+        return await PydanticResponse.create(
+            internal_response,
+            include=QUERY_RESPONSE_INCLUDE
+        )
 
     except Exception as e:
         logger.error(f"Query failed: {e}")
@@ -250,13 +364,57 @@ async def query(request: QueryRequest):
 
 
 @router.post("/query/stream")
-async def query_stream(request: QueryRequest):
-    """Process search query with streaming response (not yet implemented)"""
+async def query_stream(
+    request: QueryRequest,
+    legal_ai_service: LegalAIService = Depends(get_legal_ai_service),
+    eula_service: EULAService = Depends(get_eula_service),
+    audit_logger: AuditLogger = Depends(get_audit_logger)
+):
+    """
+    Process search query with a server-sent event stream
+
+    Events (one JSON object per "data:" line):
+    - {"event": "result", "data": {...}} for each search result, best first
+    - {"event": "done", "data": {...}} with summary, confidence and timings
+    - {"event": "error", "data": {"detail": "..."}} if the query fails
+    """
     if not eula_service.is_eula_accepted():
         raise HTTPException(status_code=403, detail="EULA must be accepted first")
 
-    # TODO: Implement streaming for new architecture
-    raise HTTPException(
-        status_code=501,
-        detail="Streaming not yet implemented in new architecture. Use /query endpoint."
+    return StreamingResponse(
+        _query_event_stream(legal_ai_service, audit_logger, request.query),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _sse_event(event: str, data: str) -> str:
+    """Format one server-sent event; data must already be JSON-encoded"""
+    return f'data: {{"event":"{event}","data":{data}}}\n\n'
+
+
+async def _query_event_stream(
+    legal_ai_service: LegalAIService,
+    audit_logger: AuditLogger,
+    query_text: str
+) -> AsyncIterator[str]:
+    """Run the query off the event loop and stream results as they are encoded"""
+    try:
+        internal_response = await run_in_threadpool(legal_ai_service.query, query_text)
+    except Exception as e:
+        logger.error(f"Streaming query failed: {e}")
+        yield _sse_event("error", orjson.dumps({"detail": str(e)}).decode())
+        return
+
+    audit_logger.log_search(query_text, len(internal_response.results))
+
+    for result in internal_response.results:
+        yield _sse_event(
+            "result",
+            result.model_dump_json(include=RESULT_INCLUDE)
+        )
+
+    yield _sse_event(
+        "done",
+        internal_response.model_dump_json(include=QUERY_SUMMARY_INCLUDE)
     )
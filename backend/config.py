@@ -4,12 +4,14 @@ OnMyPC Legal AI - Configuration
 import os
 from pathlib import Path
 from typing import Optional
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings"""
 
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
+
     # Application
     APP_NAME: str = "OnMyPC Legal AI"
     APP_VERSION: str = "1.0.0"
@@ -30,6 +32,14 @@ class Settings(BaseSettings):
     # AI Models
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     RERANKER_MODEL: str = "BAAI/bge-reranker-base"
+
+    # Search FAISS on the GPU (needs a faiss-gpu build and a CUDA device)
+    USE_GPU_INDEX: bool = False
+
+    # Document Processing
+    # PyMuPDF is AGPL-licensed; opt in only where that is cleared (pdfplumber otherwise)
+    USE_PYMUPDF: bool = False
+
     # Search Settings
     CHUNK_SIZE: int = 512
     CHUNK_OVERLAP: int = 50
@@ -47,17 +57,21 @@ class Settings(BaseSettings):
         "Review and verify before taking action."
     )
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
-
 
 # Global settings instance
 settings = Settings()
 
 
+_directories_ensured = False
+
+
 def ensure_directories():
-    """Create necessary directories if they don't exist"""
+    """Create necessary directories if they don't exist (once per process)"""
+    global _directories_ensured
+    if _directories_ensured:
+        return
+
     settings.DATA_DIR.mkdir(parents=True, exist_ok=True)
     settings.INDEX_DIR.mkdir(parents=True, exist_ok=True)
     settings.DOCS_DIR.mkdir(parents=True, exist_ok=True)
+    _directories_ensured = True
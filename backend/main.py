@@ -1,8 +1,11 @@
 """
 OnMyPC Legal AI - Main FastAPI Server
 """
+import multiprocessing
 import os
+import queue
 import sys
+import threading
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -11,10 +14,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
 from backend.config import settings, ensure_directories
-from backend.api.routes import router, init_services
+from backend.api.routes import router, run_index_worker
 from backend.services.legal_ai_service import LegalAIService
 from backend.services.security import EULAService
 from backend.utils.logger import setup_logger, AuditLogger
@@ -25,13 +29,14 @@ logger = setup_logger(__name__)
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
-    description="Complete local Legal AI assistant"
+    description="Complete local Legal AI assistant",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for local development
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
+    allow_origin_regex=r"^http://(localhost|127\.0\.0\.1):3000$",
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -57,12 +62,19 @@ async def startup_event():
     init_result = legal_ai_service.initialize()
     logger.info(f"Legal AI Service: {init_result['status']} - {init_result.get('message', '')}")
 
-    # Initialize routes with services
-    init_services(
-        legal_ai_service,
-        eula_service,
-        audit_logger
-    )
+    # Expose services to routes (injected via Depends)
+    app.state.legal_ai_service = legal_ai_service
+    app.state.eula_service = eula_service
+    app.state.audit_logger = audit_logger
+
+    # Single long-lived worker for /index jobs
+    app.state.index_queue = queue.Queue()
+    threading.Thread(
+        target=run_index_worker,
+        args=(app.state.index_queue, legal_ai_service, audit_logger),
+        name="index-worker",
+        daemon=True
+    ).start()
 
     logger.info("Services initialized successfully")
     logger.info(f"Server running at http://{settings.HOST}:{settings.PORT}")
@@ -120,4 +132,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Document parsing runs in worker processes; frozen (PyInstaller)
+    # builds need this so a worker doesn't start another server
+    multiprocessing.freeze_support()
     main()
@@ -82,8 +82,8 @@ class EnrichedChunk(BaseModel):
     section_path: List[str] = Field(default_factory=list)  # ["Agreement", "§5", "§5.2"]
     section_title: Optional[str] = None
 
-    # Vector representation
-    embedding_vector: Optional[List[float]] = None
+    # Vector representation (lives in the FAISS index; never serialized)
+    embedding_vector: Optional[List[float]] = Field(default=None, exclude=True)
 
     # Metadata
     meta: Dict[str, Any] = Field(default_factory=dict)
@@ -98,9 +98,6 @@ class EnrichedChunk(BaseModel):
     contains_money: bool = False
     contains_parties: bool = False
 
-    class Config:
-        arbitrary_types_allowed = True
-
 
 class StructuredDocument(BaseModel):
     """
@@ -156,9 +153,6 @@ class StructuredDocument(BaseModel):
     # Custom metadata
     custom_meta: Dict[str, Any] = Field(default_factory=dict)
 
-    class Config:
-        arbitrary_types_allowed = True
-
 
 class SearchQuery(BaseModel):
     """
@@ -191,9 +185,6 @@ class SearchQuery(BaseModel):
     top_k: int = 5
     include_context: bool = True
 
-    class Config:
-        arbitrary_types_allowed = True
-
 
 class SearchResult(BaseModel):
     """
@@ -215,9 +206,6 @@ class SearchResult(BaseModel):
     match_highlights: List[str] = Field(default_factory=list)
     explanation: Optional[str] = None
 
-    class Config:
-        arbitrary_types_allowed = True
-
 
 class QueryResponse(BaseModel):
     """
@@ -2,15 +2,29 @@
 Advanced Document Parser with Metadata Extraction
 Extracts structure, sections, entities, and metadata from legal documents
 """
+import os
 import re
+import sys
 import hashlib
+import pickle
+import tempfile
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple, Iterator
 from datetime import datetime
+from functools import lru_cache, partial
+from itertools import chain
 
 import pdfplumber
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+import regex
 from docx import Document as DocxDocument
-import dateparser
+from docx.oxml.ns import nsmap as docx_nsmap, qn
+from lxml import etree
 
 from backend.models.knowledge_schema import (
     StructuredDocument,
@@ -20,34 +34,114 @@ from backend.models.knowledge_schema import (
     Jurisdiction,
     DocumentVersion
 )
+from backend.config import settings
 from backend.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _file_sha256(path: str, mtime_ns: int, size: int) -> str:
+    """SHA-256 of a file, memoized on (path, mtime, size) so repeat parses skip hashing"""
+    with open(path, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+
+        sha256 = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def compute_file_hash(file_path: Path) -> str:
+    """
+    SHA-256 of a file's contents (the document's file_hash)
+
+    The hash also names the document (doc_id is its first 12 characters)
+    and its parse cache entry, so anything that looks documents up by hash
+    must use this function.
+    """
+    stat = file_path.stat()
+    return _file_sha256(str(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+# dateparser compiles thousands of locale patterns on import; load it on first use
+_dateparser = None
+
+# The formats DATE_PATTERNS normally capture ("January 5, 2024", "1/5/2024");
+# strptime gives the same result as dateparser for these at a fraction of the cost
+_NUMERIC_DATE_FORMATS = ("%m/%d/%Y", "%m-%d-%Y", "%m/%d/%y", "%m-%d-%y")
+_MONTH_DATE_FORMATS = ("%B %d, %Y", "%B %d %Y", "%b %d, %Y", "%b %d %Y")
+
+
+def _parse_date(date_str: str) -> Optional[datetime]:
+    """Parse a date string (fixed formats first, dateparser imported lazily as the fallback)"""
+    formats = _NUMERIC_DATE_FORMATS if date_str[:1].isdigit() else _MONTH_DATE_FORMATS
+    for fmt in formats:
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            pass
+
+    global _dateparser
+    if _dateparser is None:
+        import dateparser as _dateparser
+    return _dateparser.parse(date_str)
+
+
+def _outer_group_sizes(patterns: List[re.Pattern]) -> Dict[int, int]:
+    """Map each pattern's wrapping group index in a '|'-joined alternation to its own group count"""
+    sizes = {}
+    index = 1
+    for pattern in patterns:
+        sizes[index] = pattern.groups
+        index += pattern.groups + 1
+    return sizes
+
+
 class LegalDocumentParser:
     """Advanced parser for legal documents"""
 
+    # Patterns are compiled once at class load; the per-document helpers below
+    # run them many times and would otherwise thrash re's small pattern cache.
+
     # Section patterns (common in legal docs)
     SECTION_PATTERNS = [
-        r'^(?:ARTICLE|Article)\s+([IVXLCDM]+|\d+)[:\.\s]+(.+)$',  # ARTICLE I: Title
-        r'^(?:§|Section|SECTION)\s*(\d+(?:\.\d+)*)[:\.\s]+(.+)$',  # §5.2: Title
-        r'^(\d+(?:\.\d+)*)[:\.\s]+([A-Z][^\.]+)$',  # 5.2: Title
-        r'^([A-Z\s]{3,}):?\s*$',  # ALL CAPS HEADERS
+        re.compile(r'^(?:ARTICLE|Article)\s+([IVXLCDM]+|\d+)[:\.\s]+(.+)$'),  # ARTICLE I: Title
+        re.compile(r'^(?:§|Section|SECTION)\s*(\d+(?:\.\d+)*)[:\.\s]+(.+)$'),  # §5.2: Title
+        re.compile(r'^(\d+(?:\.\d+)*)[:\.\s]+([A-Z][^\.]+)$'),  # 5.2: Title
+        re.compile(r'^([A-Z\s]{3,}):?\s*$'),  # ALL CAPS HEADERS
     ]
 
+    # The section patterns as one alternation, tried in the same order; each
+    # alternative is wrapped in a group, mapped here to its inner group count
+    SECTION_PATTERN = re.compile('|'.join(f'({pattern.pattern})' for pattern in SECTION_PATTERNS))
+    SECTION_GROUP_SIZES = _outer_group_sizes(SECTION_PATTERNS)
+    SECTION_PREFIXES = ('ARTICLE', 'Article', '§', 'Section', 'SECTION')
+
     # Date patterns
     DATE_PATTERNS = [
-        r'(?:effective|executed|signed|dated)(?:\s+as\s+of)?\s*:?\s*([A-Z][a-z]+\s+\d{1,2},?\s+\d{4})',
-        r'(?:effective|executed|signed|dated)(?:\s+as\s+of)?\s*:?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})',
+        re.compile(r'(?:effective|executed|signed|dated)(?:\s+as\s+of)?\s*:?\s*([A-Z][a-z]+\s+\d{1,2},?\s+\d{4})', re.IGNORECASE),
+        re.compile(r'(?:effective|executed|signed|dated)(?:\s+as\s+of)?\s*:?\s*(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})', re.IGNORECASE),
     ]
 
     # Party patterns
     PARTY_PATTERNS = [
-        r'between\s+([A-Z][^,\(]+?)(?:\s+\([^\)]+\))?\s+and\s+([A-Z][^,\(]+?)(?:\s+\([^\)]+\))?',
-        r'by\s+and\s+between\s+([A-Z][^,\(]+?)(?:\s+\([^\)]+\))?\s+and\s+([A-Z][^,\(]+?)(?:\s+\([^\)]+\))?',
+        re.compile(r'between\s+([A-Z][^,\(]+?)(?:\s+\([^\)]+\))?\s+and\s+([A-Z][^,\(]+?)(?:\s+\([^\)]+\))?', re.IGNORECASE),
+        re.compile(r'by\s+and\s+between\s+([A-Z][^,\(]+?)(?:\s+\([^\)]+\))?\s+and\s+([A-Z][^,\(]+?)(?:\s+\([^\)]+\))?', re.IGNORECASE),
     ]
 
+    # Document type patterns
+    # ("agreement" is only looked ahead at after "confidentiality"/"licensing" so
+    # the fused scan below still counts it towards CONTRACT as well)
+    DOCTYPE_PATTERNS = {
+        DocType.CONTRACT: r'\b(?:contract|agreement|employment\s+agreement)\b',
+        DocType.NDA: r'\b(?:non-disclosure|confidentiality(?=\s+agreement\b)|NDA)\b',
+        DocType.POLICY: r'\b(?:policy|handbook|procedures?)\b',
+        DocType.LICENSE: r'\b(?:license|licensing(?=\s+agreement\b))\b',
+        DocType.MEMO: r'\b(?:memorandum|memo)\b',
+    }
+
     # Jurisdiction patterns
     JURISDICTION_PATTERNS = {
         'CA': r'\b(?:California|State\s+of\s+California)\b',
@@ -57,24 +151,100 @@ class LegalDocumentParser:
         'US': r'\b(?:United\s+States|Federal|U\.S\.)\b',
     }
 
-    # Document type patterns
-    DOCTYPE_PATTERNS = {
-        DocType.CONTRACT: r'\b(?:contract|agreement|employment\s+agreement)\b',
-        DocType.NDA: r'\b(?:non-disclosure|confidentiality\s+agreement|NDA)\b',
-        DocType.POLICY: r'\b(?:policy|handbook|procedures?)\b',
-        DocType.LICENSE: r'\b(?:license|licensing\s+agreement)\b',
-        DocType.MEMO: r'\b(?:memorandum|memo)\b',
+    # Doctype and jurisdiction keywords fused into one alternation so the header
+    # is scanned once; m.lastindex maps a match back to its (kind, key)
+    HEADER_KEYWORDS = (
+        [('doctype', doctype) for doctype in DOCTYPE_PATTERNS]
+        + [('jurisdiction', juris) for juris in JURISDICTION_PATTERNS]
+    )
+    HEADER_KEYWORD_PATTERN = re.compile(
+        '|'.join(f'({pattern})' for pattern in
+                 list(DOCTYPE_PATTERNS.values()) + list(JURISDICTION_PATTERNS.values())),
+        re.IGNORECASE
+    )
+    DOCTYPE_SAMPLE_CHARS = 2000
+    JURISDICTION_SAMPLE_CHARS = 3000
+
+    # Metadata extractors only look at the start of a document
+    HEADER_SAMPLE_CHARS = 5000
+
+    # Context kept on each side of a page break when scanning PDFs for key clauses
+    CLAUSE_BOUNDARY_CHARS = 64
+
+    # Defined terms: "Term" means ...
+    # (regex module: possessive, length-bounded captures and an atomic verb
+    # group never backtrack, so text with stray quotes stays linear; the
+    # bounds keep terms under 50 and definitions under 200 chars)
+    DEFINITION_PATTERN = regex.compile(
+        r'"([^"]{1,49}+)"\s+(?>means|shall\s+mean|is\s+defined\s+as)\s+([^\.]{1,199}+)\.',
+        regex.IGNORECASE
+    )
+
+    # Key clause patterns, fused into one alternation scanned over the full text
+    CLAUSE_PATTERNS = {
+        'non-compete': r'non-compete|non\s+competition',
+        'confidentiality': r'confidential|non-disclosure',
+        'termination': r'termination|cancellation',
+        'arbitration': r'arbitration|dispute\s+resolution',
+        'liability': r'liability|indemnif',
+        'intellectual-property': r'intellectual\s+property|ip\s+rights',
+        'governing-law': r'governing\s+law|choice\s+of\s+law',
     }
+    CLAUSE_TYPES = tuple(CLAUSE_PATTERNS)
+    CLAUSE_PATTERN = re.compile(
+        '|'.join(f'({pattern})' for pattern in CLAUSE_PATTERNS.values()), re.IGNORECASE
+    )
+
+    # Chunk features (dates, money) in one pattern; the money branch only
+    # looks ahead past '$' so it never swallows text a date could start in
+    CHUNK_FEATURE_PATTERN = re.compile(
+        r'(?P<date>\d{1,2}[-/]\d{1,2}[-/]\d{2,4})|(?P<money>\$(?=[\d,]))'
+    )
+
+    # Text-bearing nodes of body-level DOCX paragraphs, in document order
+    # (the same run content python-docx's Paragraph.text reads)
+    DOCX_TEXT_XPATH = etree.XPath(
+        'w:p | w:p/w:r/*[{0}] | w:p/w:hyperlink/w:r/*[{0}]'.format(
+            ' or '.join(f'self::w:{tag}' for tag in ('t', 'tab', 'ptab', 'br', 'cr', 'noBreakHyphen'))
+        ),
+        namespaces={'w': docx_nsmap['w']}
+    )
+    DOCX_PARAGRAPH_TAG = qn('w:p')
+    DOCX_TEXT_TAG = qn('w:t')
+    DOCX_BR_TAG = qn('w:br')
+    DOCX_BR_TYPE = qn('w:type')
+    DOCX_RUN_CHARS = {qn('w:tab'): '\t', qn('w:ptab'): '\t', qn('w:cr'): '\n', qn('w:noBreakHyphen'): '-'}
+
+    # Chunk break points
+    SENTENCE_BREAK_PATTERN = re.compile(r'\. ')
+    LINE_BREAK_PATTERN = re.compile(r'\n')
+
+    # Bump when parser output changes so stale cache entries are ignored
+    CACHE_VERSION = 1
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        """
+        Initialize parser
 
-    def __init__(self):
-        pass
+        Args:
+            cache_dir: Optional directory for parse results cached by file hash
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
 
-    def parse_document(self, file_path: Path) -> Optional[StructuredDocument]:
+    def parse_document(
+        self,
+        file_path: Path,
+        use_cache: bool = True
+    ) -> Optional[StructuredDocument]:
         """
         Parse document based on file extension
 
         Args:
             file_path: Path to document file
+            use_cache: Serve a cached parse if present (a fresh parse is
+                always written back to the cache)
 
         Returns:
             StructuredDocument or None if parsing fails
@@ -87,59 +257,213 @@ class LegalDocumentParser:
 
         extension = file_path.suffix.lower()
 
+        if extension == '.pdf':
+            parse = self.parse_pdf
+        elif extension in ['.txt', '.md']:
+            parse = self.parse_txt
+        elif extension in ['.docx', '.doc']:
+            parse = self.parse_docx
+        else:
+            logger.warning(f"Unsupported file type: {extension}")
+            return None
+
         try:
-            if extension == '.pdf':
-                return self.parse_pdf(file_path)
-            elif extension in ['.txt', '.md']:
-                return self.parse_txt(file_path)
-            elif extension in ['.docx', '.doc']:
-                return self.parse_docx(file_path)
-            else:
-                logger.warning(f"Unsupported file type: {extension}")
-                return None
+            cache_file = self._cache_file(file_path) if self.cache_dir else None
+            if cache_file is not None and use_cache:
+                doc = self._load_cached(cache_file, file_path)
+                if doc is not None:
+                    return doc
+
+            doc = parse(file_path)
+
+            if cache_file is not None:
+                self._store_cached(cache_file, doc)
+            return doc
         except Exception as e:
             logger.error(f"Error parsing {file_path.name}: {e}")
             return None
 
-    def parse_pdf(self, file_path: Path) -> StructuredDocument:
-        """Parse PDF with advanced structure extraction"""
-        logger.info(f"Advanced parsing: {file_path.name}")
+    def _cache_file(self, file_path: Path) -> Path:
+        """Cache entry for a file (content hash plus file name, which feeds title and doc_name)"""
+        name_hash = hashlib.sha256(file_path.name.encode('utf-8')).hexdigest()[:8]
+        return self.cache_dir / f"{self._calculate_hash(file_path)}-{name_hash}.pkl"
 
-        # Calculate file hash
-        file_hash = self._calculate_hash(file_path)
+    def prune_cache(self, keep_hashes: Set[str]) -> int:
+        """
+        Delete cache entries for file hashes no longer indexed, along with
+        temp files left behind by interrupted writes
 
-        # Extract text with structure
-        full_text = ""
-        pages_text = []
+        Args:
+            keep_hashes: File hashes of the documents still in the knowledge base
 
-        with pdfplumber.open(file_path) as pdf:
-            total_pages = len(pdf.pages)
-            for page in pdf.pages:
-                text = page.extract_text() or ""
-                pages_text.append(text)
-                full_text += text + "\n\n"
+        Returns:
+            Number of entries removed
+        """
+        if not self.cache_dir:
+            return 0
 
-        # Extract metadata
-        title = self._extract_title(full_text, file_path.stem)
-        doctype, doctype_conf = self._classify_document(full_text)
-        jurisdiction, juris_conf = self._extract_jurisdiction(full_text)
-        parties = self._extract_parties(full_text)
-        dates = self._extract_dates(full_text)
-        defined_terms = self._extract_definitions(full_text)
+        removed = 0
+        for cache_file in chain(self.cache_dir.glob("*.pkl"), self.cache_dir.glob("*.tmp")):
+            file_hash = cache_file.stem.rsplit('-', 1)[0]
+            if cache_file.suffix == '.pkl' and file_hash in keep_hashes:
+                continue
+            try:
+                cache_file.unlink()
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Could not remove parse cache {cache_file.name}: {e}")
+        return removed
+
+    def _load_cached(self, cache_file: Path, file_path: Path) -> Optional[StructuredDocument]:
+        """Load a cached parse result, or None on a miss"""
+        if not cache_file.exists():
+            return None
 
-        # Extract sections
-        sections, section_tree = self._extract_sections(pages_text)
+        try:
+            with open(cache_file, 'rb') as f:
+                version, doc = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache {cache_file.name}: {e}")
+            return None
 
-        # Create chunks with context
-        chunks = self._create_enriched_chunks(
-            pages_text,
-            sections,
-            file_path.stem,
-            file_hash
-        )
+        if version != self.CACHE_VERSION:
+            return None
 
-        # Detect key clauses
-        key_clauses = self._detect_key_clauses(full_text)
+        doc.file_path = str(file_path)
+        doc.indexed_at = datetime.utcnow()
+        logger.info(f"Parse cache hit: {file_path.name}")
+        return doc
+
+    def _store_cached(self, cache_file: Path, doc: StructuredDocument):
+        """Write a parse result to the cache (atomically, failures are only logged)"""
+        # Same-named copies of a file share a cache key and may be parsed by
+        # different workers at once, so each writer gets its own temp file
+        tmp_file = None
+        try:
+            fd, tmp_file = tempfile.mkstemp(
+                dir=self.cache_dir, prefix=f"{cache_file.stem}.", suffix='.tmp'
+            )
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((self.CACHE_VERSION, doc), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            logger.warning(f"Could not write parse cache for {doc.title}: {e}")
+            if tmp_file is not None:
+                try:
+                    os.unlink(tmp_file)
+                except OSError:
+                    pass
+
+    def parse_batch(
+        self,
+        paths: List[Path],
+        workers: Optional[int] = None
+    ) -> List[Optional[StructuredDocument]]:
+        """
+        Parse many documents in parallel worker processes
+
+        The parser keeps no state beyond its cache directory, so each worker
+        process uses its own get_parser() instance for the same cache.
+
+        Args:
+            paths: Document file paths
+            workers: Number of worker processes (defaults to the CPU count)
+
+        Returns:
+            Parsed documents in input order (None where parsing failed)
+        """
+        return list(self.iter_parse_batch(paths, workers))
+
+    def iter_parse_batch(
+        self,
+        paths: List[Path],
+        workers: Optional[int] = None,
+        use_cache: bool = True
+    ) -> Iterator[Optional[StructuredDocument]]:
+        """
+        Like parse_batch, but yield each document as soon as it (and every
+        earlier one) is parsed, so callers can work while workers continue
+
+        Args:
+            paths: Document file paths
+            workers: Number of worker processes (defaults to the CPU count)
+            use_cache: Serve cached parses (False re-parses every file)
+
+        Yields:
+            Parsed documents in input order (None where parsing failed)
+        """
+        paths = [Path(p) for p in paths]
+        if len(paths) <= 1:
+            yield from (self.parse_document(p, use_cache) for p in paths)
+            return
+
+        # Each worker builds its shared parser once, then parses its paths with it
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=get_parser,
+            initargs=(self.cache_dir,)
+        ) as executor:
+            yield from executor.map(
+                partial(_parse_with_shared_parser, self.cache_dir, use_cache),
+                paths,
+                chunksize=4
+            )
+
+    def parse_pdf(self, file_path: Path) -> StructuredDocument:
+        """Parse PDF with advanced structure extraction"""
+        logger.info(f"Advanced parsing: {file_path.name}")
+
+        sections: List[Dict] = []
+        section_nodes: List[SectionNode] = []
+        chunks: List[EnrichedChunk] = []
+        found_clauses: Set[int] = set()
+        total_pages = 0
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # Hash the file on a worker thread while the header pages are extracted
+            hash_future = executor.submit(self._calculate_hash, file_path)
+
+            # Pages are streamed; only the leading pages that make up the
+            # header sample are held at once, and full_text is never built
+            pages = self._iter_pdf_pages(file_path)
+            header_pages = []
+            header_length = -2
+            for text in pages:
+                header_pages.append(text)
+                header_length += len(text) + 2
+                if header_length >= self.HEADER_SAMPLE_CHARS:
+                    break
+
+            # Extract metadata (every extractor reads from the same header sample)
+            header = "\n\n".join(header_pages)[:self.HEADER_SAMPLE_CHARS]
+            title = self._extract_title(header, file_path.stem)
+            (doctype, doctype_conf), (jurisdiction, juris_conf) = self._classify_header(header)
+            parties = self._extract_parties(header)
+            dates = self._extract_dates(header)
+            defined_terms = self._extract_definitions(header)
+
+            file_hash = hash_future.result()
+
+            # Extract sections, chunks and key clauses one page at a time
+            previous_text = ""
+            for page_num, page_text in enumerate(chain(header_pages, pages), start=1):
+                total_pages = page_num
+                current_section = self._extract_page_sections(
+                    page_text, page_num, sections, section_nodes
+                )
+                self._append_page_chunks(
+                    page_text, page_num, current_section, file_path.stem, file_hash, chunks
+                )
+
+                if len(found_clauses) < len(self.CLAUSE_TYPES):
+                    # Clause keywords may straddle the page break
+                    boundary = previous_text[-self.CLAUSE_BOUNDARY_CHARS:] + "\n\n" + page_text[:self.CLAUSE_BOUNDARY_CHARS]
+                    self._scan_key_clauses(boundary, found_clauses)
+                    self._scan_key_clauses(page_text, found_clauses)
+                previous_text = page_text
+
+        self._build_section_hierarchy(section_nodes)
+        key_clauses = self._key_clause_list(found_clauses)
 
         # Create structured document
         doc = StructuredDocument(
@@ -159,10 +483,9 @@ class LegalDocumentParser:
             version=DocumentVersion.SIGNED,
             total_pages=total_pages,
             total_sections=len(sections),
-            section_tree=section_tree,
+            section_tree=section_nodes,
             chunks=chunks,
             total_chunks=len(chunks),
-            full_text=full_text,
             defined_terms=defined_terms,
             key_clauses=key_clauses,
         )
@@ -174,23 +497,37 @@ class LegalDocumentParser:
 
         return doc
 
+    def _iter_pdf_pages(self, file_path: Path) -> Iterator[str]:
+        """Yield the text of each PDF page (PyMuPDF when enabled, else pdfplumber)"""
+        if settings.USE_PYMUPDF and fitz is not None:
+            with fitz.open(file_path) as pdf:
+                for page in pdf:
+                    yield page.get_text("text")
+        else:
+            with pdfplumber.open(file_path) as pdf:
+                for page in pdf.pages:
+                    yield page.extract_text() or ""
+
     def parse_txt(self, file_path: Path) -> StructuredDocument:
         """Parse TXT file"""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            full_text = f.read()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            hash_future = executor.submit(self._calculate_hash, file_path)
+
+            with open(file_path, 'r', encoding='utf-8') as f:
+                full_text = f.read()
 
-        file_hash = self._calculate_hash(file_path)
+            file_hash = hash_future.result()
 
         # Split into pages (simulate)
         pages_text = self._split_text_into_pages(full_text)
 
-        # Extract metadata
-        title = self._extract_title(full_text, file_path.stem)
-        doctype, doctype_conf = self._classify_document(full_text)
-        jurisdiction, juris_conf = self._extract_jurisdiction(full_text)
-        parties = self._extract_parties(full_text)
-        dates = self._extract_dates(full_text)
-        defined_terms = self._extract_definitions(full_text)
+        # Extract metadata (every extractor reads from the same header sample)
+        header = full_text[:self.HEADER_SAMPLE_CHARS]
+        title = self._extract_title(header, file_path.stem)
+        (doctype, doctype_conf), (jurisdiction, juris_conf) = self._classify_header(header)
+        parties = self._extract_parties(header)
+        dates = self._extract_dates(header)
+        defined_terms = self._extract_definitions(header)
 
         # Extract sections
         sections, section_tree = self._extract_sections(pages_text)
@@ -234,23 +571,26 @@ class LegalDocumentParser:
     def parse_docx(self, file_path: Path) -> StructuredDocument:
         """Parse DOCX file"""
         try:
-            docx_doc = DocxDocument(file_path)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                hash_future = executor.submit(self._calculate_hash, file_path)
 
-            # Extract full text
-            full_text = '\n'.join([para.text for para in docx_doc.paragraphs])
+                docx_doc = DocxDocument(file_path)
 
-            file_hash = self._calculate_hash(file_path)
+                # Extract full text
+                full_text = self._extract_docx_text(docx_doc)
+
+                file_hash = hash_future.result()
 
             # Split into pages (simulate)
             pages_text = self._split_text_into_pages(full_text)
 
-            # Extract metadata
-            title = self._extract_title(full_text, file_path.stem)
-            doctype, doctype_conf = self._classify_document(full_text)
-            jurisdiction, juris_conf = self._extract_jurisdiction(full_text)
-            parties = self._extract_parties(full_text)
-            dates = self._extract_dates(full_text)
-            defined_terms = self._extract_definitions(full_text)
+            # Extract metadata (every extractor reads from the same header sample)
+            header = full_text[:self.HEADER_SAMPLE_CHARS]
+            title = self._extract_title(header, file_path.stem)
+            (doctype, doctype_conf), (jurisdiction, juris_conf) = self._classify_header(header)
+            parties = self._extract_parties(header)
+            dates = self._extract_dates(header)
+            defined_terms = self._extract_definitions(header)
 
             # Extract sections
             sections, section_tree = self._extract_sections(pages_text)
@@ -296,18 +636,41 @@ class LegalDocumentParser:
             # Fallback: treat as text
             return self.parse_txt(file_path)
 
+    def _extract_docx_text(self, docx_doc) -> str:
+        """
+        Join body paragraph text with newlines
+
+        Equivalent to '\\n'.join(para.text for para in docx_doc.paragraphs), but
+        walks the XML with one precompiled XPath instead of building paragraph
+        and run proxies (each of which evaluates its own XPath).
+        """
+        paragraphs = []
+        parts = None
+        for node in self.DOCX_TEXT_XPATH(docx_doc.element.body):
+            tag = node.tag
+            if tag == self.DOCX_PARAGRAPH_TAG:
+                parts = []
+                paragraphs.append(parts)
+            elif tag == self.DOCX_TEXT_TAG:
+                if node.text:
+                    parts.append(node.text)
+            elif tag == self.DOCX_BR_TAG:
+                # Only line breaks produce text; page/column breaks are dropped
+                if node.get(self.DOCX_BR_TYPE, 'textWrapping') == 'textWrapping':
+                    parts.append('\n')
+            else:
+                parts.append(self.DOCX_RUN_CHARS[tag])
+
+        return '\n'.join(''.join(parts) for parts in paragraphs)
+
     def _calculate_hash(self, file_path: Path) -> str:
         """Calculate SHA-256 hash of file"""
-        sha256 = hashlib.sha256()
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+        return compute_file_hash(file_path)
 
-    def _extract_title(self, text: str, filename: str) -> str:
+    def _extract_title(self, header: str, filename: str) -> str:
         """Extract document title"""
         # Look for title in first 500 chars
-        lines = text[:500].split('\n')
+        lines = header[:500].split('\n')
         for line in lines:
             line = line.strip()
             if len(line) > 10 and len(line) < 100 and line.isupper():
@@ -319,57 +682,64 @@ class LegalDocumentParser:
 
         return filename.replace('_', ' ').title()
 
-    def _classify_document(self, text: str) -> Tuple[DocType, float]:
-        """Classify document type"""
-        text_lower = text[:2000].lower()  # First 2000 chars
-
-        scores = {}
-        for doctype, pattern in self.DOCTYPE_PATTERNS.items():
-            matches = len(re.findall(pattern, text_lower, re.IGNORECASE))
-            scores[doctype] = matches
-
-        if not scores or max(scores.values()) == 0:
-            return DocType.OTHER, 0.0
-
-        best_type = max(scores, key=scores.get)
-        confidence = min(scores[best_type] / 5.0, 1.0)  # Normalize
+    def _classify_header(self, header: str) -> Tuple[Tuple[DocType, float], Tuple[Jurisdiction, float]]:
+        """
+        Classify document type and jurisdiction in a single keyword scan
 
-        return best_type, confidence
+        Doctype keywords count within the first 2000 chars, jurisdiction
+        keywords within the first 3000.
 
-    def _extract_jurisdiction(self, text: str) -> Tuple[Jurisdiction, float]:
-        """Extract jurisdiction"""
-        text_sample = text[:3000]  # First 3000 chars
+        Returns:
+            ((doctype, confidence), (jurisdiction, confidence))
+        """
+        scores = {
+            'doctype': dict.fromkeys(self.DOCTYPE_PATTERNS, 0),
+            'jurisdiction': dict.fromkeys(self.JURISDICTION_PATTERNS, 0),
+        }
 
-        scores = {}
-        for juris, pattern in self.JURISDICTION_PATTERNS.items():
-            matches = len(re.findall(pattern, text_sample, re.IGNORECASE))
-            scores[juris] = matches
+        for match in self.HEADER_KEYWORD_PATTERN.finditer(header, 0, self.JURISDICTION_SAMPLE_CHARS):
+            kind, key = self.HEADER_KEYWORDS[match.lastindex - 1]
+            if kind == 'doctype' and match.end() > self.DOCTYPE_SAMPLE_CHARS:
+                continue
+            scores[kind][key] += 1
 
-        if not scores or max(scores.values()) == 0:
-            return Jurisdiction.OTHER, 0.0
+        doctype_scores = scores['doctype']
+        if max(doctype_scores.values()) == 0:
+            doctype_result = (DocType.OTHER, 0.0)
+        else:
+            best_type = max(doctype_scores, key=doctype_scores.get)
+            doctype_result = (best_type, min(doctype_scores[best_type] / 5.0, 1.0))  # Normalize
 
-        best_juris = max(scores, key=scores.get)
-        confidence = min(scores[best_juris] / 3.0, 1.0)
+        juris_scores = scores['jurisdiction']
+        if max(juris_scores.values()) == 0:
+            juris_result = (Jurisdiction.OTHER, 0.0)
+        else:
+            best_juris = max(juris_scores, key=juris_scores.get)
+            juris_result = (Jurisdiction(best_juris), min(juris_scores[best_juris] / 3.0, 1.0))
 
-        return Jurisdiction(best_juris), confidence
+        return doctype_result, juris_result
 
-    def _extract_parties(self, text: str) -> List[str]:
+    def _extract_parties(self, header: str) -> List[str]:
         """Extract party names"""
+        max_parties = 5
         parties = []
-        text_sample = text[:2000]
+        seen = set()
 
         for pattern in self.PARTY_PATTERNS:
-            matches = re.finditer(pattern, text_sample, re.IGNORECASE)
+            matches = pattern.finditer(header, 0, 2000)  # First 2000 chars
             for match in matches:
                 for group in match.groups():
                     if group:
                         party = group.strip().strip(',').strip()
-                        if len(party) > 3 and party not in parties:
+                        if len(party) > 3 and party not in seen:
+                            seen.add(party)
                             parties.append(party)
+                            if len(parties) == max_parties:
+                                return parties
 
-        return parties[:5]  # Max 5 parties
+        return parties
 
-    def _extract_dates(self, text: str) -> Dict[str, Optional[datetime]]:
+    def _extract_dates(self, header: str) -> Dict[str, Optional[datetime]]:
         """Extract important dates"""
         dates = {
             'creation': None,
@@ -377,13 +747,11 @@ class LegalDocumentParser:
             'expiration': None
         }
 
-        text_sample = text[:3000]
-
         for pattern in self.DATE_PATTERNS:
-            matches = re.finditer(pattern, text_sample, re.IGNORECASE)
+            matches = pattern.finditer(header, 0, 3000)  # First 3000 chars
             for match in matches:
                 date_str = match.group(1)
-                parsed_date = dateparser.parse(date_str)
+                parsed_date = _parse_date(date_str)
                 if parsed_date:
                     # Heuristic: first date is usually effective date
                     if not dates['effective']:
@@ -392,102 +760,116 @@ class LegalDocumentParser:
 
         return dates
 
-    def _extract_definitions(self, text: str) -> Dict[str, str]:
+    def _extract_definitions(self, header: str) -> Dict[str, str]:
         """Extract defined terms"""
         defined_terms = {}
 
-        # Pattern: "Term" means ...
-        pattern = r'"([^"]+)"\s+(?:means|shall\s+mean|is\s+defined\s+as)\s+([^\.]+)\.'
-        matches = re.finditer(pattern, text[:5000], re.IGNORECASE)
+        matches = self.DEFINITION_PATTERN.finditer(header)
 
         for match in matches:
             term = match.group(1).strip()
             definition = match.group(2).strip()
-            if len(term) < 50 and len(definition) < 200:
-                defined_terms[term] = definition
+            defined_terms[term] = definition
 
         return defined_terms
 
     def _detect_key_clauses(self, text: str) -> List[str]:
         """Detect key clause types"""
-        clauses = []
-        text_lower = text.lower()
-
-        clause_keywords = {
-            'non-compete': r'non-compete|non\s+competition',
-            'confidentiality': r'confidential|non-disclosure',
-            'termination': r'termination|cancellation',
-            'arbitration': r'arbitration|dispute\s+resolution',
-            'liability': r'liability|indemnif',
-            'intellectual-property': r'intellectual\s+property|ip\s+rights',
-            'governing-law': r'governing\s+law|choice\s+of\s+law',
-        }
+        found = set()
+        self._scan_key_clauses(text, found)
+        return self._key_clause_list(found)
 
-        for clause_type, pattern in clause_keywords.items():
-            if re.search(pattern, text_lower):
-                clauses.append(clause_type)
+    def _scan_key_clauses(self, text: str, found: Set[int]):
+        """Add the indexes of clause types present in text to found"""
+        for match in self.CLAUSE_PATTERN.finditer(text):
+            found.add(match.lastindex - 1)
+            if len(found) == len(self.CLAUSE_TYPES):
+                break
 
-        return clauses
+    def _key_clause_list(self, found: Set[int]) -> List[str]:
+        """Clause type names for found indexes, in CLAUSE_PATTERNS order"""
+        return [clause_type for i, clause_type in enumerate(self.CLAUSE_TYPES) if i in found]
 
     def _extract_sections(self, pages_text: List[str]) -> Tuple[List[Dict], List[SectionNode]]:
         """Extract section structure"""
         sections = []
         section_nodes = []
-        current_page = 0
-        section_id_counter = 0
 
         for page_num, page_text in enumerate(pages_text, start=1):
-            lines = page_text.split('\n')
-
-            for line_idx, line in enumerate(lines):
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Try to match section patterns
-                for pattern in self.SECTION_PATTERNS:
-                    match = re.match(pattern, line)
-                    if match:
-                        section_id = f"sec_{section_id_counter}"
-                        section_id_counter += 1
-
-                        # Extract number and title
-                        if len(match.groups()) >= 2:
-                            number = match.group(1).strip()
-                            title = match.group(2).strip()
-                        else:
-                            number = None
-                            title = line
-
-                        # Determine level based on number format
-                        level = self._determine_section_level(number)
-
-                        section_info = {
-                            'id': section_id,
-                            'number': number,
-                            'title': title,
-                            'page': page_num,
-                            'level': level
-                        }
-
-                        sections.append(section_info)
-
-                        node = SectionNode(
-                            id=section_id,
-                            number=number,
-                            title=title,
-                            level=level,
-                            page_start=page_num
-                        )
-                        section_nodes.append(node)
-
-                        break
+            self._extract_page_sections(page_text, page_num, sections, section_nodes)
 
         # Build hierarchy
         self._build_section_hierarchy(section_nodes)
 
         return sections, section_nodes
 
+    def _extract_page_sections(
+        self,
+        page_text: str,
+        page_num: int,
+        sections: List[Dict],
+        section_nodes: List[SectionNode]
+    ) -> Optional[Dict]:
+        """
+        Append the sections found on one page
+
+        Returns:
+            The page's last section (the one its chunks are attributed to), or None
+        """
+        current_section = None
+
+        for line in page_text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+
+            # Cheap reject: section lines start with a heading keyword, a
+            # digit, or (ALL CAPS headers) three uppercase/space characters
+            if not (line.startswith(self.SECTION_PREFIXES)
+                    or line[0].isdigit()
+                    or (len(line) >= 3 and line[:3].isupper())):
+                continue
+
+            # Try to match section patterns
+            match = self.SECTION_PATTERN.match(line)
+            if match:
+                section_id = f"sec_{len(sections)}"
+
+                # Extract number and title (inner groups follow the
+                # matched alternative's own group)
+                group = match.lastindex
+                if self.SECTION_GROUP_SIZES[group] >= 2:
+                    number = match.group(group + 1).strip()
+                    title = match.group(group + 2).strip()
+                else:
+                    number = None
+                    title = line
+
+                # Determine level based on number format
+                level = self._determine_section_level(number)
+
+                section_info = {
+                    'id': section_id,
+                    'number': number,
+                    'title': title,
+                    'page': page_num,
+                    'level': level
+                }
+
+                sections.append(section_info)
+
+                node = SectionNode(
+                    id=section_id,
+                    number=number,
+                    title=title,
+                    level=level,
+                    page_start=page_num
+                )
+                section_nodes.append(node)
+                current_section = section_info
+
+        return current_section
+
     def _determine_section_level(self, number: Optional[str]) -> int:
         """Determine section level from number format"""
         if not number:
@@ -504,13 +886,16 @@ class LegalDocumentParser:
 
     def _build_section_hierarchy(self, nodes: List[SectionNode]):
         """Build parent-child relationships"""
-        for i, node in enumerate(nodes):
-            # Find parent (previous node with lower level)
-            for j in range(i - 1, -1, -1):
-                if nodes[j].level < node.level:
-                    node.parent_id = nodes[j].id
-                    nodes[j].children_ids.append(node.id)
-                    break
+        # Stack of open ancestors; after popping every node at the same or a
+        # deeper level, the top is the nearest previous node with a lower level
+        stack = []
+        for node in nodes:
+            while stack and stack[-1].level >= node.level:
+                stack.pop()
+            if stack:
+                node.parent_id = stack[-1].id
+                stack[-1].children_ids.append(node.id)
+            stack.append(node)
 
     def _create_enriched_chunks(
         self,
@@ -521,78 +906,112 @@ class LegalDocumentParser:
     ) -> List[EnrichedChunk]:
         """Create enriched chunks with metadata"""
         chunks = []
-        chunk_counter = 0
 
-        for page_num, page_text in enumerate(pages_text, start=1):
-            # Find current section for this page
-            current_section = None
-            for section in sections:
-                if section['page'] == page_num:
-                    current_section = section
-
-            # Split page into chunks (512 chars with 50 overlap)
-            page_chunks = self._chunk_text(page_text, size=512, overlap=50)
-
-            for chunk_text in page_chunks:
-                if not chunk_text.strip():
-                    continue
-
-                chunk_id = f"{doc_id[:12]}#p{page_num}#c{chunk_counter:02d}"
-                chunk_counter += 1
-
-                # Analyze chunk
-                is_header = self._is_header(chunk_text)
-                contains_dates = bool(re.search(r'\d{1,2}[-/]\d{1,2}[-/]\d{2,4}', chunk_text))
-                contains_money = bool(re.search(r'\$[\d,]+', chunk_text))
-
-                chunk = EnrichedChunk(
-                    chunk_id=chunk_id,
-                    doc_id=doc_id[:12],
-                    text=chunk_text,
-                    tokens=len(chunk_text.split()),
-                    page_start=page_num,
-                    page_end=page_num,
-                    section_id=current_section['id'] if current_section else None,
-                    section_title=current_section['title'] if current_section else None,
-                    section_path=[current_section['title']] if current_section else [],
-                    is_header=is_header,
-                    contains_dates=contains_dates,
-                    contains_money=contains_money,
-                    meta={'doc_name': doc_name}
-                )
+        # Chunks are attributed to the last section starting on their page
+        page_sections = {section['page']: section for section in sections}
 
-                chunks.append(chunk)
+        for page_num, page_text in enumerate(pages_text, start=1):
+            self._append_page_chunks(
+                page_text, page_num, page_sections.get(page_num), doc_name, doc_id, chunks
+            )
 
         return chunks
 
+    def _append_page_chunks(
+        self,
+        page_text: str,
+        page_num: int,
+        current_section: Optional[Dict],
+        doc_name: str,
+        doc_id: str,
+        chunks: List[EnrichedChunk]
+    ):
+        """Split one page into enriched chunks and append them to chunks"""
+        # Split page into chunks (512 chars with 50 overlap)
+        page_chunks = self._chunk_text(page_text, size=512, overlap=50)
+
+        # Every chunk of a document repeats these strings; interning makes
+        # them share one object instead of one copy per chunk
+        short_doc_id = sys.intern(doc_id[:12])
+        doc_name = sys.intern(doc_name)
+        section_id = sys.intern(current_section['id']) if current_section else None
+        section_title = sys.intern(current_section['title']) if current_section else None
+
+        for chunk_text in page_chunks:
+            if not chunk_text.strip():
+                continue
+
+            chunk_id = f"{short_doc_id}#p{page_num}#c{len(chunks):02d}"
+
+            # Analyze chunk
+            is_header = self._is_header(chunk_text)
+            contains_dates, contains_money = self._chunk_features(chunk_text)
+
+            chunk = EnrichedChunk(
+                chunk_id=chunk_id,
+                doc_id=short_doc_id,
+                text=chunk_text,
+                tokens=len(chunk_text.split()),
+                page_start=page_num,
+                page_end=page_num,
+                section_id=section_id,
+                section_title=section_title,
+                section_path=[section_title] if section_title is not None else [],
+                is_header=is_header,
+                contains_dates=contains_dates,
+                contains_money=contains_money,
+                meta={'doc_name': doc_name}
+            )
+
+            chunks.append(chunk)
+
     def _chunk_text(self, text: str, size: int = 512, overlap: int = 50) -> List[str]:
         """Split text into chunks"""
         if not text.strip():
             return []
 
+        # Offsets of every '. ' and newline, found once so each window locates
+        # its last break point by binary search instead of rfind
+        periods = [m.start() for m in self.SENTENCE_BREAK_PATTERN.finditer(text)]
+        newlines = [m.start() for m in self.LINE_BREAK_PATTERN.finditer(text)]
+
         chunks = []
         start = 0
         text_length = len(text)
 
         while start < text_length:
             end = start + size
-            chunk = text[start:end]
 
             # Try to break at sentence boundary
             if end < text_length:
-                last_period = chunk.rfind('. ')
-                last_newline = chunk.rfind('\n')
-                break_point = max(last_period, last_newline)
+                # '. ' must fit inside the window, so its period is at most end - 2
+                i = bisect_right(periods, end - 2) - 1
+                j = bisect_right(newlines, end - 1) - 1
+                last_break = max(periods[i] if i >= 0 else -1, newlines[j] if j >= 0 else -1)
+                break_point = last_break - start
 
                 if break_point > size * 0.5:
-                    chunk = chunk[:break_point + 1]
                     end = start + break_point + 1
 
-            chunks.append(chunk.strip())
+            chunks.append(text[start:end].strip())
             start = end - overlap
 
         return [c for c in chunks if c]
 
+    def _chunk_features(self, text: str) -> Tuple[bool, bool]:
+        """Check whether text contains a date and/or a money amount (single scan)"""
+        contains_dates = contains_money = False
+
+        for match in self.CHUNK_FEATURE_PATTERN.finditer(text):
+            if match.lastgroup == 'date':
+                contains_dates = True
+            else:
+                contains_money = True
+            if contains_dates and contains_money:
+                break
+
+        return contains_dates, contains_money
+
     def _is_header(self, text: str) -> bool:
         """Check if text looks like a header"""
         text = text.strip()
@@ -602,11 +1021,7 @@ class LegalDocumentParser:
             return True
 
         # Matches section pattern
-        for pattern in self.SECTION_PATTERNS:
-            if re.match(pattern, text):
-                return True
-
-        return False
+        return bool(self.SECTION_PATTERN.match(text))
 
     def _split_text_into_pages(self, text: str, chars_per_page: int = 3000) -> List[str]:
         """Split text into simulated pages"""
@@ -628,3 +1043,26 @@ class LegalDocumentParser:
             pages.append('\n'.join(current_page))
 
         return pages
+
+
+@lru_cache(maxsize=None)
+def get_parser(cache_dir: Optional[Path] = None) -> LegalDocumentParser:
+    """
+    Get the process-wide parser for a cache directory (created on first use)
+
+    Args:
+        cache_dir: Optional directory for parse results cached by file hash
+
+    Returns:
+        Shared LegalDocumentParser instance
+    """
+    return LegalDocumentParser(cache_dir=cache_dir)
+
+
+def _parse_with_shared_parser(
+    cache_dir: Optional[Path],
+    use_cache: bool,
+    file_path: Path
+) -> Optional[StructuredDocument]:
+    """parse_batch worker entry point"""
+    return get_parser(cache_dir).parse_document(file_path, use_cache)
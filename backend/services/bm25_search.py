@@ -3,12 +3,20 @@ BM25 Search Engine for Legal Documents
 Keyword-based retrieval using BM25 algorithm
 """
 from typing import List, Dict, Tuple, Optional
-from rank_bm25 import BM25Okapi
+from functools import lru_cache
+from collections import Counter
+from array import array
+import numpy as np
+import math
 import re
 from pathlib import Path
-import json
 import logging
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 from backend.models.knowledge_schema import (
     StructuredDocument,
     EnrichedChunk,
@@ -17,6 +25,372 @@ from backend.models.knowledge_schema import (
 
 logger = logging.getLogger(__name__)
 
+# Tokenizer patterns (compiled once; tokenize() runs for every chunk and query)
+# Section references and money amounts never overlap, so one alternation
+# rewrites them all in a single pass
+_REWRITE_RE = re.compile(
+    r'§\s*(\d+(?:\.\d+)*)'              # §5.2
+    r'|\bsection\s+(\d+(?:\.\d+)*)'     # section 5.2
+    r'|\$\s*([\d,]+(?:\.\d+)?)'          # $1,000,000
+)
+# A match always covers whole letter runs, so it can only start at the
+# beginning of one; the lookbehind stops the engine from retrying (and
+# backtracking) at every letter inside a word. Same matches as without it.
+_HYPHEN_RE = re.compile(r'(?<![a-z])([a-z]+)-([a-z]+)')
+# \w already includes "_", and a greedy \w+ run is always bounded by \b
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def _rewrite_special(match: re.Match) -> str:
+    """section_5.2 for section references, usd_1000000 for money amounts"""
+    amount = match.group(3)
+    if amount is not None:
+        return f"usd_{amount.replace(',', '')}"
+    return f"section_{match.group(1) or match.group(2)}"
+
+
+# Legal-specific stop words (minimal - preserve legal terms)
+_STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for',
+    'from', 'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on',
+    'that', 'the', 'to', 'was', 'will', 'with'
+})
+
+
+@lru_cache(maxsize=4096)
+def _tokenize_cached(text: str) -> Tuple[str, ...]:
+    """
+    Tokenize text with legal term preservation (see BM25SearchEngine.tokenize)
+
+    Cached because the same chunk and query text is tokenized repeatedly
+    (exclusion filtering, hybrid search highlights).
+    """
+    # Preserve special patterns
+    # Section references: §5.2, section 5.2 -> section_5.2
+    # Money amounts: $1,000,000 -> usd_1000000
+    # (substring checks are a C scan; most chunks skip the regex pass)
+    text = text.lower()
+    if '§' in text or '$' in text or 'section' in text:
+        text = _REWRITE_RE.sub(_rewrite_special, text)
+
+    # Hyphenated legal terms: preserve
+    # (non-compete, force-majeure, etc.; runs after the rewrite above so
+    # "x-§5" still joins into x_section_5)
+    if '-' in text:
+        text = _HYPHEN_RE.sub(r'\1_\2', text)
+
+    # Tokenize, removing stop words but keeping legal terms
+    return tuple(
+        t for t in _TOKEN_RE.findall(text)
+        if t not in _STOP_WORDS or len(t) > 3 or '_' in t
+    )
+
+
+def _accumulate_postings(
+    scores: np.ndarray,
+    term_ids: np.ndarray,
+    term_offsets: np.ndarray,
+    posting_chunks: np.ndarray,
+    posting_weights: np.ndarray
+) -> None:
+    """Add each query term's posting weights into scores, in query order"""
+    for i in range(term_ids.shape[0]):
+        term_id = term_ids[i]
+        for p in range(term_offsets[term_id], term_offsets[term_id + 1]):
+            scores[posting_chunks[p]] += posting_weights[p]
+
+
+# With numba the posting loop compiles to a single fused pass (no gathered
+# index/weight temporaries per term); without it the NumPy scatter is used.
+# Sums happen in the same order either way, so scores are identical.
+if njit is not None:
+    _accumulate_postings = njit(cache=True, nogil=True)(_accumulate_postings)
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a flat, Structure-of-Arrays tokenized corpus
+
+    Instead of a list of token lists, every chunk's token ids are stored back
+    to back in term_ids, and doc_offsets[i]:doc_offsets[i + 1] delimits chunk
+    i. Postings are grouped by term (term_offsets) with each chunk's BM25
+    contribution precomputed. Scores match rank_bm25.BM25Okapi exactly
+    (ATIRE idf with negative values floored to epsilon * average idf).
+    """
+
+    # MaxScore only considers skipping posting lists longer than
+    # corpus_size / LONG_POSTING_RATIO
+    LONG_POSTING_RATIO = 16
+
+    def __init__(
+        self,
+        term_ids: np.ndarray,
+        doc_offsets: np.ndarray,
+        terms: List[str],
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25
+    ):
+        """
+        Args:
+            term_ids: int32 token ids of all chunks, concatenated
+            doc_offsets: int64 chunk boundaries into term_ids (len = chunks + 1)
+            terms: Token string for each term id
+        """
+        self.term_ids = term_ids
+        self.doc_offsets = doc_offsets
+        self.terms = terms
+        self.vocab: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+
+        self.corpus_size = len(doc_offsets) - 1
+        self.doc_len = np.diff(doc_offsets)
+        self.avgdl = int(doc_offsets[-1]) / self.corpus_size if self.corpus_size else 0.0
+
+        # Unique (chunk, term) pairs with their term frequencies, grouped by term
+        num_terms = max(len(terms), 1)
+        token_chunks = np.repeat(np.arange(self.corpus_size, dtype=np.int64), self.doc_len)
+        pairs, tf = np.unique(token_chunks * num_terms + term_ids, return_counts=True)
+        by_term = np.argsort(pairs % num_terms, kind='stable')
+        pairs, tf = pairs[by_term], tf[by_term]
+        pair_terms = pairs % num_terms
+        pair_chunks = pairs // num_terms
+
+        doc_freq = np.bincount(pair_terms, minlength=len(terms))
+        self.term_offsets = np.concatenate(([0], np.cumsum(doc_freq)))
+        self.idf = self._calc_idf(doc_freq)
+
+        # idf * tf*(k1+1) / (tf + k1*(1-b+b*dl/avgdl)) per posting, in the same
+        # operation order as BM25Okapi.get_scores
+        self.posting_chunks = pair_chunks.astype(np.int32)
+        self.posting_weights = self.idf[pair_terms] * (
+            tf * (k1 + 1) /
+            (tf + k1 * (1 - b + b * self.doc_len[pair_chunks] / self.avgdl))
+        )
+
+        # Largest contribution of each term, the MaxScore upper bound
+        self.max_weights = (
+            np.maximum.reduceat(self.posting_weights, self.term_offsets[:-1])
+            if len(self.posting_weights) else np.zeros(0)
+        )
+        # Pruning relies on every term only ever raising a score (idf can be
+        # floored to a negative epsilon on tiny corpora)
+        self.prunable = not len(self.posting_weights) or self.posting_weights.min() >= 0
+
+    def _calc_idf(self, doc_freq: np.ndarray) -> np.ndarray:
+        """ATIRE idf per term id, summed in term order like rank_bm25"""
+        idf = []
+        idf_sum = 0
+        for freq in doc_freq.tolist():
+            value = math.log(self.corpus_size - freq + 0.5) - math.log(freq + 0.5)
+            idf.append(value)
+            idf_sum += value
+
+        if idf:
+            eps = self.epsilon * (idf_sum / len(idf))
+            idf = [eps if value < 0 else value for value in idf]
+
+        return np.array(idf, dtype=np.float64)
+
+    def get_scores(
+        self,
+        query_tokens: List[str],
+        top_k: int = 0,
+        allowed: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        BM25 score of every chunk for the query tokens
+
+        Args:
+            query_tokens: Tokenized query
+            top_k: When set, MaxScore-prune chunks that provably cannot make
+                the top_k; those are returned with a score of 0
+            allowed: Optional boolean mask of chunks eligible for the top_k
+
+        Returns:
+            float64 scores aligned with the corpus
+        """
+        term_ids = self._term_ids(query_tokens)
+
+        if top_k > 0 and self.prunable and len(set(term_ids)) > 1:
+            scores = self._maxscore_scores(term_ids, top_k, allowed)
+            if scores is not None:
+                return scores
+
+        scores = np.zeros(self.corpus_size)
+        if njit is not None:
+            _accumulate_postings(
+                scores, np.asarray(term_ids, dtype=np.int64), self.term_offsets,
+                self.posting_chunks, self.posting_weights
+            )
+            return scores
+        for term_id in term_ids:
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            scores[self.posting_chunks[start:end]] += self.posting_weights[start:end]
+        return scores
+
+    def get_subset_scores(self, query_tokens: List[str], chunks: np.ndarray) -> np.ndarray:
+        """
+        BM25 scores of only the given chunks
+
+        Each term's postings are binary-searched for the chunks instead of
+        scattered over the whole corpus, so cost scales with len(chunks).
+
+        Args:
+            query_tokens: Tokenized query
+            chunks: Sorted chunk positions to score
+
+        Returns:
+            float64 scores aligned with chunks
+        """
+        scores = np.zeros(len(chunks))
+        for term_id in self._term_ids(query_tokens):
+            hit, weights = self._posting_lookup(term_id, chunks)
+            scores[hit] += weights
+        return scores
+
+    def _term_ids(self, query_tokens: List[str]) -> List[int]:
+        """Ids of the query tokens in the vocabulary, in query order"""
+        return [
+            term_id for term_id in map(self.vocab.get, query_tokens)
+            if term_id is not None
+        ]
+
+    def _posting_lookup(self, term_id: int, chunks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(mask of chunks containing the term, their weights) via binary search"""
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        postings = self.posting_chunks[start:end]
+        pos = np.searchsorted(postings, chunks)
+        pos[pos == len(postings)] = 0
+        hit = postings[pos] == chunks
+        return hit, self.posting_weights[start + pos[hit]]
+
+    def _maxscore_scores(
+        self,
+        term_ids: List[int],
+        top_k: int,
+        allowed: Optional[np.ndarray]
+    ) -> Optional[np.ndarray]:
+        """
+        MaxScore: accumulate terms by descending upper bound up to the first
+        long posting list. If the running k-th best score already beats all
+        the remaining terms could add, those (low-idf, long) posting lists
+        are only probed for the chunks that can still make the top_k.
+
+        Returns:
+            Scores with everything outside the top_k (and ties) left at 0,
+            or None if pruning would not pay off for this query
+        """
+        counts = Counter(term_ids)
+        order = sorted(counts, key=lambda t: -counts[t] * self.max_weights[t])
+
+        # remaining[i]: most the terms order[i:] can add to any chunk
+        remaining = [0.0] * (len(order) + 1)
+        for i in range(len(order) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + counts[order[i]] * float(self.max_weights[order[i]])
+
+        # Relative slack so float rounding never prunes a chunk that ties
+        slack = 1 + 1e-9
+        partial = np.zeros(self.corpus_size)
+        processed = []
+        for i, term_id in enumerate(order):
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            postings = self.posting_chunks[start:end]
+
+            # Check once, right before the first long posting list: that is
+            # where skipping pays, while the chunks touched so far are few
+            if (end - start) * self.LONG_POSTING_RATIO >= self.corpus_size:
+                if not i:
+                    return None
+
+                touched = np.unique(np.concatenate(processed))
+                if allowed is not None:
+                    touched = touched[allowed[touched]]
+                touched_scores = partial[touched]
+                if len(touched) < top_k:
+                    return None
+
+                kth = len(touched) - top_k
+                threshold = np.partition(touched_scores, kth)[kth]
+                if threshold <= remaining[i] * slack:
+                    return None
+
+                # Scores only grow, so the final k-th best is at least
+                # threshold; untouched chunks can't reach it any more
+                keep = (touched_scores + remaining[i]) * slack >= threshold
+                return self._finish_candidates(
+                    term_ids, counts, order[i:], top_k,
+                    touched[keep], touched_scores[keep]
+                )
+
+            partial[postings] += counts[term_id] * self.posting_weights[start:end]
+            processed.append(postings)
+
+        return None
+
+    def _finish_candidates(
+        self,
+        term_ids: List[int],
+        counts: Counter,
+        rest: List[int],
+        top_k: int,
+        candidates: np.ndarray,
+        candidate_scores: np.ndarray
+    ) -> np.ndarray:
+        """Add the skipped terms for the MaxScore candidates and score the top exactly"""
+        for term_id in rest:
+            hit, weights = self._posting_lookup(term_id, candidates)
+            candidate_scores[hit] += counts[term_id] * weights
+
+        # These sums ran in bound order; keep everything near the k-th best
+        # and recompute those in query order so scores match unpruned ones
+        if len(candidates) > top_k:
+            kth = len(candidates) - top_k
+            threshold = np.partition(candidate_scores, kth)[kth]
+            candidates = candidates[candidate_scores >= threshold * (1 - 1e-9)]
+
+        exact = np.zeros(len(candidates))
+        for term_id in term_ids:
+            hit, weights = self._posting_lookup(term_id, candidates)
+            exact[hit] += weights
+
+        scores = np.zeros(self.corpus_size)
+        scores[candidates] = exact
+        return scores
+
+    @property
+    def total_tokens(self) -> int:
+        return int(self.doc_offsets[-1])
+
+    def save(self, index_file: Path, chunk_ids: List[str]) -> None:
+        """Write the corpus arrays to a single .npz (the rest is derived on load)"""
+        np.savez(
+            index_file,
+            term_ids=self.term_ids,
+            doc_offsets=self.doc_offsets,
+            # Tokens never contain whitespace, so newline-joined UTF-8 is lossless
+            terms=np.frombuffer("\n".join(self.terms).encode('utf-8'), dtype=np.uint8),
+            chunk_ids=np.frombuffer("\0".join(chunk_ids).encode('utf-8'), dtype=np.uint8),
+            params=np.array([self.k1, self.b, self.epsilon]),
+        )
+
+    @classmethod
+    def load(cls, index_file: Path) -> Tuple["BM25Index", List[str]]:
+        """Read an index written by save(); returns (index, chunk_ids)"""
+        with np.load(index_file, allow_pickle=False) as data:
+            terms_blob = data['terms'].tobytes().decode('utf-8')
+            chunk_ids_blob = data['chunk_ids'].tobytes().decode('utf-8')
+            k1, b, epsilon = data['params'].tolist()
+            index = cls(
+                data['term_ids'],
+                data['doc_offsets'],
+                terms_blob.split("\n") if terms_blob else [],
+                k1=k1, b=b, epsilon=epsilon
+            )
+        return index, (chunk_ids_blob.split("\0") if index.corpus_size else [])
+
 
 class BM25SearchEngine:
     """
@@ -29,18 +403,33 @@ class BM25SearchEngine:
     - Term frequency caching for fast retrieval
     """
 
+    # Legal-specific stop words (minimal - preserve legal terms)
+    stop_words = _STOP_WORDS
+
+    # Boolean chunk attributes kept as columns for vectorized boosting
+    CHUNK_FLAGS = ("is_header", "is_definition", "contains_dates", "contains_money")
+
     def __init__(self):
-        self.bm25_index: Optional[BM25Okapi] = None
+        self.bm25_index: Optional[BM25Index] = None
         self.chunks: List[EnrichedChunk] = []
         self.documents: Dict[str, StructuredDocument] = {}
-        self.tokenized_corpus: List[List[str]] = []
-
-        # Legal-specific stop words (minimal - preserve legal terms)
-        self.stop_words = {
-            'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for',
-            'from', 'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on',
-            'that', 'the', 'to', 'was', 'will', 'with'
-        }
+        # doc_id -> sorted positions of its chunks in self.chunks, for filtering
+        self._chunks_by_doc: Dict[str, np.ndarray] = {}
+        # doc_id -> {chunk_id: position in doc.chunks} for context lookups
+        self._chunk_pos: Dict[str, Dict[str, int]] = {}
+        # chunk_id -> row (first wins) of the CHUNK_FLAGS columns
+        self._chunk_rows: Dict[str, int] = {}
+        self._chunk_flags: np.ndarray = np.zeros((0, len(self.CHUNK_FLAGS)), dtype=bool)
+        # doc_id -> row of the per-document columns; the extra last row
+        # ('' version, NaT date) stands in for unknown documents
+        self._doc_rows: Dict[str, int] = {}
+        self._doc_versions: np.ndarray = np.array([''])
+        self._doc_effective_dates: np.ndarray = np.array(['NaT'], dtype='datetime64[us]')
+        # doc_id -> lowercased party names for party filters
+        self._parties_lower: Dict[str, frozenset] = {}
+        # Inverted indices: doctype / jurisdiction -> doc_ids
+        self._by_doctype: Dict[str, set] = {}
+        self._by_jurisdiction: Dict[str, set] = {}
 
     def tokenize(self, text: str) -> List[str]:
         """
@@ -53,35 +442,7 @@ class BM25SearchEngine:
         - Dates (January 1, 2024)
         - Compound legal terms (non-compete, force-majeure)
         """
-        # Lowercase
-        text = text.lower()
-
-        # Preserve special patterns
-        # Section references: §5.2, section 5.2
-        text = re.sub(r'§\s*(\d+(?:\.\d+)*)', r'section_\1', text)
-        text = re.sub(r'\bsection\s+(\d+(?:\.\d+)*)', r'section_\1', text)
-
-        # Money amounts: $1,000,000 -> usd_1000000
-        text = re.sub(r'\$\s*([\d,]+(?:\.\d+)?)', lambda m: f"usd_{m.group(1).replace(',', '')}", text)
-
-        # Dates: normalize to year if present
-        year_pattern = r'\b(19|20)\d{2}\b'
-        years = re.findall(year_pattern, text)
-
-        # Hyphenated legal terms: preserve
-        # (non-compete, force-majeure, etc.)
-        text = re.sub(r'([a-z]+)-([a-z]+)', r'\1_\2', text)
-
-        # Tokenize
-        tokens = re.findall(r'\b[\w_]+\b', text)
-
-        # Remove stop words but keep legal terms
-        tokens = [
-            t for t in tokens
-            if t not in self.stop_words or len(t) > 3 or '_' in t
-        ]
-
-        return tokens
+        return list(_tokenize_cached(text))
 
     def build_index(self, documents: List[StructuredDocument]) -> None:
         """
@@ -94,7 +455,14 @@ class BM25SearchEngine:
 
         self.chunks = []
         self.documents = {}
-        self.tokenized_corpus = []
+
+        # Tokenized corpus as flat token ids + per-chunk offsets
+        vocab: Dict[str, int] = {}
+        term_ids = array('i')
+        doc_offsets = array('q', [0])
+
+        # Bound tokenizer cache memory across indexing runs
+        _tokenize_cached.cache_clear()
 
         for doc in documents:
             self.documents[doc.doc_id] = doc
@@ -103,22 +471,159 @@ class BM25SearchEngine:
                 self.chunks.append(chunk)
 
                 # Tokenize chunk text
-                tokens = self.tokenize(chunk.text)
-                self.tokenized_corpus.append(tokens)
+                tokens = _tokenize_cached(chunk.text)
+                term_ids.extend([vocab.setdefault(token, len(vocab)) for token in tokens])
+                doc_offsets.append(len(term_ids))
 
                 # Cache term frequencies in chunk metadata
-                chunk.term_frequencies = {}
-                for token in tokens:
-                    chunk.term_frequencies[token] = chunk.term_frequencies.get(token, 0) + 1
+                chunk.term_frequencies = dict(Counter(tokens))
+
+        self._build_document_lookups()
 
         # Build BM25 index
-        if self.tokenized_corpus:
-            self.bm25_index = BM25Okapi(self.tokenized_corpus)
+        if self.chunks:
+            self.bm25_index = BM25Index(
+                np.frombuffer(term_ids, dtype=np.int32),
+                np.frombuffer(doc_offsets, dtype=np.int64),
+                list(vocab)
+            )
             logger.info(f"BM25 index built with {len(self.chunks)} chunks")
         else:
             logger.warning("No chunks found for BM25 indexing")
             self.bm25_index = None
 
+    def _build_document_lookups(self) -> None:
+        """Per-document lookups: chunk positions (first wins), parties, filter indices"""
+        chunks_by_doc: Dict[str, List[int]] = {}
+        for i, chunk in enumerate(self.chunks):
+            chunks_by_doc.setdefault(chunk.doc_id, []).append(i)
+        self._chunks_by_doc = {
+            doc_id: np.array(positions, dtype=np.int64)
+            for doc_id, positions in chunks_by_doc.items()
+        }
+
+        self._chunk_rows = {}
+        for i, chunk in enumerate(self.chunks):
+            self._chunk_rows.setdefault(chunk.chunk_id, i)
+        self._chunk_flags = self._read_chunk_flags(self.chunks)
+
+        docs = list(self.documents.values())
+        self._doc_rows = {doc.doc_id: row for row, doc in enumerate(docs)}
+        self._doc_versions = np.array([doc.version.value for doc in docs] + [''])
+        self._doc_effective_dates = np.array(
+            [doc.effective_date for doc in docs] + [None], dtype='datetime64[us]'
+        )
+
+        self._chunk_pos = {}
+        self._parties_lower = {}
+        self._by_doctype = {}
+        self._by_jurisdiction = {}
+        for doc_id, doc in self.documents.items():
+            positions: Dict[str, int] = {}
+            for i, c in enumerate(doc.chunks):
+                positions.setdefault(c.chunk_id, i)
+            self._chunk_pos[doc_id] = positions
+            self._parties_lower[doc_id] = frozenset(p.lower() for p in (doc.parties or []))
+            self._by_doctype.setdefault(doc.doctype, set()).add(doc_id)
+            self._by_jurisdiction.setdefault(doc.jurisdiction, set()).add(doc_id)
+
+    def _read_chunk_flags(self, chunks: List[EnrichedChunk]) -> np.ndarray:
+        """CHUNK_FLAGS attributes of chunks as a (len(chunks), n_flags) bool array"""
+        return np.array(
+            [[getattr(chunk, flag) for flag in self.CHUNK_FLAGS] for chunk in chunks],
+            dtype=bool
+        ).reshape(len(chunks), len(self.CHUNK_FLAGS))
+
+    def get_chunk_flags(self, chunks: List[EnrichedChunk]) -> np.ndarray:
+        """
+        CHUNK_FLAGS columns for the given chunks
+
+        Rows are gathered from the columns built at index time; chunks
+        that aren't in the index fall back to reading the attributes.
+
+        Returns:
+            (len(chunks), len(CHUNK_FLAGS)) bool array
+        """
+        rows = [self._chunk_rows.get(chunk.chunk_id, -1) for chunk in chunks]
+        if -1 in rows:
+            return self._read_chunk_flags(chunks)
+        return self._chunk_flags[rows]
+
+    def get_document_columns(self, chunks: List[EnrichedChunk]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Version and effective date of each chunk's document
+
+        Returns:
+            (version values, datetime64 effective dates) aligned with chunks;
+            '' and NaT for missing dates or documents not in the index
+        """
+        rows = [self._doc_rows.get(chunk.doc_id, -1) for chunk in chunks]
+        return self._doc_versions[rows], self._doc_effective_dates[rows]
+
+    def _filter_chunks(self, filter_doc_ids: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Sorted positions of chunks belonging to filter_doc_ids (None = no filter)"""
+        if not filter_doc_ids:
+            return None
+        positions = [
+            self._chunks_by_doc[doc_id] for doc_id in set(filter_doc_ids)
+            if doc_id in self._chunks_by_doc
+        ]
+        if not positions:
+            return np.array([], dtype=np.int64)
+        return np.sort(np.concatenate(positions))
+
+    def _score_query(
+        self,
+        query_tokens: List[str],
+        top_k: int,
+        subset: Optional[np.ndarray]
+    ) -> np.ndarray:
+        """BM25 scores aligned with subset (the whole corpus when None)"""
+        index = self.bm25_index
+        if subset is None:
+            return index.get_scores(query_tokens, top_k)
+
+        # Selective filter: score only the subset's chunks
+        if len(subset) * BM25Index.LONG_POSTING_RATIO < index.corpus_size:
+            return index.get_subset_scores(query_tokens, subset)
+
+        # Broad filter: full (pruned) scoring restricted to the subset
+        allowed = np.zeros(index.corpus_size, dtype=bool)
+        allowed[subset] = True
+        return index.get_scores(query_tokens, top_k, allowed)[subset]
+
+    def _select_top_k(
+        self,
+        scores: np.ndarray,
+        top_k: int,
+        subset: Optional[np.ndarray] = None
+    ) -> List[Tuple[EnrichedChunk, float]]:
+        """Positive-scoring chunks, best first; scores are aligned with subset if given"""
+        # Only include chunks with positive scores
+        candidates = np.flatnonzero(scores > 0)
+        candidate_scores = scores[candidates]
+
+        # Map back to corpus positions if only a subset was scored
+        if subset is not None:
+            candidates = subset[candidates]
+
+        # Keep everything scoring at least the k-th best (ties included), so
+        # only those are sorted
+        if len(candidates) > top_k > 0:
+            kth = len(candidates) - top_k
+            threshold = np.partition(candidate_scores, kth)[kth]
+            keep = candidate_scores >= threshold
+            candidates = candidates[keep]
+            candidate_scores = candidate_scores[keep]
+
+        # Sort by score descending; stable so ties stay in corpus order
+        order = np.argsort(-candidate_scores, kind='stable')[:max(top_k, 0)]
+
+        return [
+            (self.chunks[i], float(candidate_scores[j]))
+            for j, i in zip(order, candidates[order])
+        ]
+
     def search(
         self,
         query: str,
@@ -148,29 +653,48 @@ class BM25SearchEngine:
 
         logger.info(f"BM25 search for query tokens: {query_tokens[:10]}")
 
-        # Get BM25 scores
-        scores = self.bm25_index.get_scores(query_tokens)
+        # Get BM25 scores (pruned to chunks that can still make the top-k)
+        subset = self._filter_chunks(filter_doc_ids)
+        scores = self._score_query(query_tokens, top_k, subset)
 
-        # Combine chunks with scores
-        results = []
-        for idx, score in enumerate(scores):
-            chunk = self.chunks[idx]
+        top_results = self._select_top_k(scores, top_k, subset)
+        logger.info(f"BM25 search returned {len(top_results)} results (top {top_k})")
 
-            # Apply document filter if provided
-            if filter_doc_ids and chunk.doc_id not in filter_doc_ids:
-                continue
+        return top_results
 
-            if score > 0:  # Only include chunks with positive scores
-                results.append((chunk, float(score)))
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 20,
+        filter_doc_ids: Optional[List[str]] = None
+    ) -> List[List[Tuple[EnrichedChunk, float]]]:
+        """
+        Search several queries against the corpus in one call
 
-        # Sort by score descending
-        results.sort(key=lambda x: x[1], reverse=True)
+        Args:
+            queries: Search query strings
+            top_k: Number of top results to return per query
+            filter_doc_ids: Optional list of document IDs to filter by
 
-        # Return top-k
-        top_results = results[:top_k]
-        logger.info(f"BM25 search returned {len(top_results)} results (top {top_k})")
+        Returns:
+            One result list per query, each as returned by search()
+        """
+        if not self.bm25_index or not self.chunks:
+            logger.warning("BM25 index not built")
+            return [[] for _ in queries]
 
-        return top_results
+        subset = self._filter_chunks(filter_doc_ids)
+        results = []
+        for query in queries:
+            query_tokens = _tokenize_cached(query)
+            if not query_tokens:
+                results.append([])
+                continue
+            scores = self._score_query(query_tokens, top_k, subset)
+            results.append(self._select_top_k(scores, top_k, subset))
+
+        logger.info(f"BM25 batch search ran {len(queries)} queries (top {top_k})")
+        return results
 
     def search_with_filters(
         self,
@@ -194,8 +718,23 @@ class BM25SearchEngine:
             List of (chunk, bm25_score) tuples
         """
         # Get candidate document IDs based on filters
-        candidate_doc_ids = self._apply_filters(structured_query)
+        return self.search_candidates(structured_query, self._apply_filters(structured_query))
+
+    def search_candidates(
+        self,
+        structured_query: SearchQuery,
+        candidate_doc_ids: Optional[List[str]]
+    ) -> List[Tuple[EnrichedChunk, float]]:
+        """
+        search_with_filters() with the metadata filters already applied
 
+        Args:
+            structured_query: Structured search query with filters
+            candidate_doc_ids: Result of _apply_filters() for the query
+
+        Returns:
+            List of (chunk, bm25_score) tuples
+        """
         # Build query with required/excluded terms
         query_text = structured_query.text_query
 
@@ -212,16 +751,15 @@ class BM25SearchEngine:
 
         # Apply excluded terms filter
         if structured_query.excluded_terms:
-            excluded_tokens = set()
-            for term in structured_query.excluded_terms:
-                excluded_tokens.update(self.tokenize(term))
+            excluded_tokens = frozenset(
+                token
+                for term in structured_query.excluded_terms
+                for token in _tokenize_cached(term)
+            )
 
             results = [
                 (chunk, score) for chunk, score in results
-                if not any(
-                    token in self.tokenize(chunk.text)
-                    for token in excluded_tokens
-                )
+                if excluded_tokens.isdisjoint(_tokenize_cached(chunk.text))
             ]
 
         return results
@@ -233,40 +771,45 @@ class BM25SearchEngine:
         Returns:
             List of document IDs that match filters, or None for no filter
         """
-        candidate_docs = list(self.documents.values())
+        # Candidate doc IDs, narrowed by each active filter (None = all docs)
+        candidate_ids: Optional[set] = None
 
         # Filter by document type
         if query.doctypes:
-            candidate_docs = [
-                doc for doc in candidate_docs
-                if doc.doctype in query.doctypes
-            ]
+            candidate_ids = set().union(
+                *(self._by_doctype.get(doctype, ()) for doctype in query.doctypes)
+            )
 
         # Filter by jurisdiction
         if query.jurisdictions:
-            candidate_docs = [
-                doc for doc in candidate_docs
-                if doc.jurisdiction in query.jurisdictions
-            ]
+            jurisdiction_ids = set().union(
+                *(self._by_jurisdiction.get(j, ()) for j in query.jurisdictions)
+            )
+            candidate_ids = (
+                jurisdiction_ids if candidate_ids is None
+                else candidate_ids & jurisdiction_ids
+            )
 
         # Filter by date range
         if query.date_range:
             start_date, end_date = query.date_range
-            candidate_docs = [
-                doc for doc in candidate_docs
-                if doc.effective_date and start_date <= doc.effective_date <= end_date
-            ]
+            candidate_ids = {
+                doc_id for doc_id in (self.documents if candidate_ids is None else candidate_ids)
+                if self.documents[doc_id].effective_date
+                and start_date <= self.documents[doc_id].effective_date <= end_date
+            }
 
         # Filter by parties
         if query.parties:
-            candidate_docs = [
-                doc for doc in candidate_docs
-                if any(party.lower() in [p.lower() for p in doc.parties] for party in query.parties)
-            ]
-
-        # Return document IDs
-        if len(candidate_docs) < len(self.documents):
-            return [doc.doc_id for doc in candidate_docs]
+            query_parties = [party.lower() for party in query.parties]
+            candidate_ids = {
+                doc_id for doc_id in (self.documents if candidate_ids is None else candidate_ids)
+                if any(party in self._parties_lower[doc_id] for party in query_parties)
+            }
+
+        # Return document IDs (in index order)
+        if candidate_ids is not None and len(candidate_ids) < len(self.documents):
+            return [doc_id for doc_id in self.documents if doc_id in candidate_ids]
         else:
             return None  # No filtering needed
 
@@ -295,11 +838,8 @@ class BM25SearchEngine:
 
         # Find chunk index in document
         try:
-            chunk_idx = next(
-                i for i, c in enumerate(doc.chunks)
-                if c.chunk_id == chunk.chunk_id
-            )
-        except StopIteration:
+            chunk_idx = self._chunk_pos[chunk.doc_id][chunk.chunk_id]
+        except KeyError:
             return [chunk]
 
         # Get context window
@@ -312,16 +852,17 @@ class BM25SearchEngine:
         """
         Save BM25 index and metadata to disk
 
-        Note: BM25Okapi doesn't have built-in serialization,
-        so we save the tokenized corpus and rebuild on load
+        The SoA corpus arrays go to a single bm25_index.npz together with
+        the chunk id order, so load can verify it matches the documents
         """
         save_dir = Path(save_dir)
         save_dir.mkdir(parents=True, exist_ok=True)
 
-        # Save tokenized corpus
-        corpus_file = save_dir / "bm25_corpus.json"
-        with open(corpus_file, 'w', encoding='utf-8') as f:
-            json.dump(self.tokenized_corpus, f)
+        index_file = save_dir / "bm25_index.npz"
+        if self.bm25_index:
+            self.bm25_index.save(index_file, [chunk.chunk_id for chunk in self.chunks])
+        elif index_file.exists():
+            index_file.unlink()
 
         logger.info(f"BM25 index metadata saved to {save_dir}")
 
@@ -334,27 +875,54 @@ class BM25SearchEngine:
             documents: Documents to index (needed for full rebuild)
         """
         load_dir = Path(load_dir)
-        corpus_file = load_dir / "bm25_corpus.json"
+        index_file = load_dir / "bm25_index.npz"
 
-        if corpus_file.exists():
-            with open(corpus_file, 'r', encoding='utf-8') as f:
-                self.tokenized_corpus = json.load(f)
+        if index_file.exists():
+            if self._restore_index(index_file, documents):
+                logger.info(f"BM25 index loaded from {load_dir}")
+                return
 
             # Rebuild from documents (ensures chunks are available)
             self.build_index(documents)
-            logger.info(f"BM25 index loaded from {load_dir}")
+            logger.info(f"BM25 index rebuilt from {load_dir}")
         else:
-            logger.warning(f"BM25 index file not found: {corpus_file}")
+            logger.warning(f"BM25 index file not found: {index_file}")
             self.build_index(documents)
 
+    def _restore_index(self, index_file: Path, documents: List[StructuredDocument]) -> bool:
+        """
+        Reattach a saved index without re-tokenizing the corpus
+
+        Returns:
+            True if the saved index matches the documents' chunks, False if
+            it has to be rebuilt
+        """
+        try:
+            bm25_index, chunk_ids = BM25Index.load(index_file)
+        except Exception as e:
+            logger.warning(f"Could not read BM25 index {index_file}: {e}")
+            return False
+
+        chunks = [chunk for doc in documents for chunk in doc.chunks]
+        if not chunks or chunk_ids != [chunk.chunk_id for chunk in chunks]:
+            logger.info("BM25 index does not match loaded documents, rebuilding")
+            return False
+
+        self.bm25_index = bm25_index
+        self.chunks = chunks
+        self.documents = {doc.doc_id: doc for doc in documents}
+        self._build_document_lookups()
+        _tokenize_cached.cache_clear()
+        return True
+
     def get_stats(self) -> Dict[str, any]:
         """Get search engine statistics"""
         return {
             "total_chunks": len(self.chunks),
             "total_documents": len(self.documents),
-            "corpus_size": len(self.tokenized_corpus),
+            "corpus_size": self.bm25_index.corpus_size if self.bm25_index else 0,
             "avg_tokens_per_chunk": (
-                sum(len(tokens) for tokens in self.tokenized_corpus) / len(self.tokenized_corpus)
-                if self.tokenized_corpus else 0
+                self.bm25_index.total_tokens / self.bm25_index.corpus_size
+                if self.bm25_index else 0
             )
         }
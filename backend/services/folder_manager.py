@@ -1,7 +1,8 @@
 """
 Folder Manager - Track indexed document folders
 """
-import json
+import orjson
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Optional
@@ -10,6 +11,18 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1024)
+def _resolve_absolute(folder_path: str) -> str:
+    """Resolve symlinks of an absolute path (cached, resolve() hits the filesystem)"""
+    return str(Path(folder_path).resolve())
+
+
+def _resolve(folder_path: str) -> str:
+    """Canonical folder key; made absolute first so the cache is cwd-independent"""
+    # Join rather than os.path.abspath: ".." must still be resolved after symlinks
+    return _resolve_absolute(str(Path.cwd() / folder_path))
+
+
 class FolderManager:
     """Manages the list of indexed document folders"""
 
@@ -21,26 +34,27 @@ class FolderManager:
             storage_path: Path to store folder metadata (e.g., data/indexed_folders.json)
         """
         self.storage_path = storage_path
-        self.folders = self._load_folders()
+        # Keyed by resolved folder path; dict order keeps insertion order
+        self.folders: Dict[str, Dict] = self._load_folders()
 
-    def _load_folders(self) -> List[Dict]:
+    def _load_folders(self) -> Dict[str, Dict]:
         """Load folder list from disk"""
         if self.storage_path.exists():
             try:
-                with open(self.storage_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return data.get('folders', [])
+                data = orjson.loads(self.storage_path.read_bytes())
+                return {folder['path']: folder for folder in data.get('folders', [])}
             except Exception as e:
                 logger.error(f"Failed to load folder list: {e}")
-                return []
-        return []
+                return {}
+        return {}
 
     def _save_folders(self):
-        """Save folder list to disk"""
+        """Save folder list to disk (atomically, so a crash never leaves a torn file)"""
         try:
             self.storage_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.storage_path, 'w', encoding='utf-8') as f:
-                json.dump({'folders': self.folders}, f, indent=2, default=str)
+            tmp_path = self.storage_path.with_suffix('.json.tmp')
+            tmp_path.write_bytes(orjson.dumps({'folders': list(self.folders.values())}, default=str))
+            tmp_path.replace(self.storage_path)
             logger.info(f"Saved {len(self.folders)} folders to {self.storage_path}")
         except Exception as e:
             logger.error(f"Failed to save folder list: {e}")
@@ -53,14 +67,10 @@ class FolderManager:
             folder_path: Absolute path to the folder
             document_count: Number of documents indexed from this folder
         """
-        folder_path = str(Path(folder_path).resolve())
+        folder_path = _resolve(folder_path)
 
         # Check if folder already exists
-        existing = None
-        for folder in self.folders:
-            if folder['path'] == folder_path:
-                existing = folder
-                break
+        existing = self.folders.get(folder_path)
 
         now = datetime.now().isoformat()
 
@@ -71,12 +81,12 @@ class FolderManager:
             logger.info(f"Updated folder: {folder_path}")
         else:
             # Add new folder
-            self.folders.append({
+            self.folders[folder_path] = {
                 'path': folder_path,
                 'added_at': now,
                 'last_indexed': now,
                 'document_count': document_count
-            })
+            }
             logger.info(f"Added new folder: {folder_path}")
 
         self._save_folders()
@@ -91,12 +101,9 @@ class FolderManager:
         Returns:
             True if removed, False if not found
         """
-        folder_path = str(Path(folder_path).resolve())
-
-        original_count = len(self.folders)
-        self.folders = [f for f in self.folders if f['path'] != folder_path]
+        folder_path = _resolve(folder_path)
 
-        if len(self.folders) < original_count:
+        if self.folders.pop(folder_path, None) is not None:
             self._save_folders()
             logger.info(f"Removed folder: {folder_path}")
             return True
@@ -105,18 +112,15 @@ class FolderManager:
 
     def get_folders(self) -> List[Dict]:
         """Get list of all tracked folders"""
-        return self.folders
+        return list(self.folders.values())
 
     def get_folder(self, folder_path: str) -> Optional[Dict]:
         """Get info for a specific folder"""
-        folder_path = str(Path(folder_path).resolve())
-        for folder in self.folders:
-            if folder['path'] == folder_path:
-                return folder
-        return None
+        folder_path = _resolve(folder_path)
+        return self.folders.get(folder_path)
 
     def clear_all(self):
         """Clear all tracked folders"""
-        self.folders = []
+        self.folders = {}
         self._save_folders()
         logger.info("Cleared all tracked folders")
@@ -2,9 +2,12 @@
 Hybrid Search Engine
 Combines BM25 (keyword) + Vector (semantic) + Cross-Encoder (reranking)
 """
-from typing import List, Dict, Tuple, Optional
-from datetime import datetime
+from typing import Iterator, List, Dict, Tuple, Optional
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 import logging
+import re
 import numpy as np
 from collections import defaultdict
 
@@ -19,6 +22,45 @@ from backend.services.bm25_search import BM25SearchEngine
 
 logger = logging.getLogger(__name__)
 
+# Sentence boundary for highlights: terminal punctuation followed by
+# whitespace (". ", ".\n", "? ", "! "), so "5.2" stays intact. The period
+# is dropped as before; "?" and "!" stay with their sentence.
+_SENTENCE_END_RE = re.compile(r'\.\s+|(?<=[!?])\s+')
+
+
+def _iter_sentences(text: str) -> Iterator[str]:
+    """Sentences of text in order, split lazily"""
+    start = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        yield text[start:match.start()]
+        start = match.end()
+    yield text[start:]
+
+
+class ScoreTable:
+    """
+    Candidate chunks and their scores as they move through the pipeline
+
+    One float64 row per chunk (BM25, VECTOR, BOOST, FINAL columns), kept
+    aligned with the chunks list. Stages update columns in place and
+    reorder rows with argsort; tuples are only built for SearchResults.
+    """
+
+    BM25, VECTOR, BOOST, FINAL = range(4)
+
+    def __init__(self, chunks: List[EnrichedChunk], scores: np.ndarray):
+        self.chunks = chunks
+        self.scores = scores
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def sort_head(self, n: int) -> None:
+        """Stable-sort the first n rows by final score, best first"""
+        order = np.argsort(-self.scores[:n, self.FINAL], kind='stable')
+        self.chunks[:n] = [self.chunks[i] for i in order.tolist()]
+        self.scores[:n] = self.scores[order]
+
 
 class HybridSearchEngine:
     """
@@ -35,6 +77,9 @@ class HybridSearchEngine:
     precision (ranking them correctly).
     """
 
+    # Pairs per cross-encoder forward pass
+    CROSS_ENCODER_BATCH_SIZE = 32
+
     def __init__(
         self,
         bm25_engine: BM25SearchEngine,
@@ -83,92 +128,113 @@ class HybridSearchEngine:
         logger.info(f"Intent: {structured_query.intent}")
         logger.info(f"Filters: threshold={score_threshold}, min={min_results}, max={max_results}")
 
-        # Stage 1: BM25 keyword search
-        bm25_results = self.bm25_engine.search_with_filters(structured_query)
-        logger.info(f"BM25 returned {len(bm25_results)} results")
+        # Metadata filters are shared by both retrievers, so resolve them once
+        candidate_doc_ids = self.bm25_engine._apply_filters(structured_query)
+
+        # Stages 1 and 2 share no state: the vector search (query embedding +
+        # FAISS, both release the GIL) runs in a worker thread while BM25
+        # scores here, so latency is max(bm25, vector) rather than the sum
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            vector_future = executor.submit(
+                self._vector_search_with_filters, structured_query, candidate_doc_ids
+            )
+
+            # Stage 1: BM25 keyword search
+            bm25_results = self.bm25_engine.search_candidates(structured_query, candidate_doc_ids)
+            logger.info(f"BM25 returned {len(bm25_results)} results")
+
+            # Stage 2: Vector semantic search
+            vector_results = vector_future.result()
+            logger.info(f"Vector search returned {len(vector_results)} results")
+
+        # Stages 3 and 4: fusion and metadata boosting (the table holds all
+        # that's needed from here on, so drop the retriever lists)
+        table = self._fuse_and_boost(structured_query, bm25_results, vector_results)
+        del bm25_results, vector_results
 
-        # Stage 2: Vector semantic search
-        vector_results = self._vector_search_with_filters(structured_query)
-        logger.info(f"Vector search returned {len(vector_results)} results")
+        # Stage 5: Cross-encoder reranking (optional, for top-k; the rest
+        # keep their boosted order after it)
+        if self.cross_encoder and len(table) > 0:
+            self._cross_encoder_rerank(structured_query.text_query, table)
 
+        return self._select_results(
+            structured_query, table, score_threshold, min_results, max_results, strict_threshold
+        )
+
+    def _fuse_and_boost(
+        self,
+        structured_query: SearchQuery,
+        bm25_results: List[Tuple[EnrichedChunk, float]],
+        vector_results: List[Tuple[EnrichedChunk, float]]
+    ) -> ScoreTable:
+        """Fuse both retrievers' results and apply metadata boosting"""
         # Stage 3: Fuse results using Reciprocal Rank Fusion (RRF)
-        fused_results = self._reciprocal_rank_fusion(
+        table = self._reciprocal_rank_fusion(
             bm25_results=bm25_results,
             vector_results=vector_results,
             k=60  # RRF parameter
         )
-        logger.info(f"Fused {len(fused_results)} unique results")
+        logger.info(f"Fused {len(table)} unique results")
 
         # Stage 4: Apply metadata boosting
-        boosted_results = self._apply_metadata_boosting(
-            results=fused_results,
-            query=structured_query
-        )
-
-        # Stage 5: Cross-encoder reranking (optional, for top-k)
-        if self.cross_encoder and len(boosted_results) > 0:
-            top_k_for_rerank = min(20, len(boosted_results))
-            reranked_results = self._cross_encoder_rerank(
-                query=structured_query.text_query,
-                results=boosted_results[:top_k_for_rerank]
-            )
-            # Combine reranked top-k with rest
-            final_results = reranked_results + boosted_results[top_k_for_rerank:]
-        else:
-            final_results = boosted_results
+        self._apply_metadata_boosting(table=table, query=structured_query)
+        return table
 
+    def _select_results(
+        self,
+        structured_query: SearchQuery,
+        table: ScoreTable,
+        score_threshold: float,
+        min_results: int,
+        max_results: int,
+        strict_threshold: bool
+    ) -> List[SearchResult]:
+        """Normalize final scores, apply the threshold policy, build SearchResults"""
         # Normalize scores to 0-1 range (max score = 1.0)
-        if final_results:
-            max_score = final_results[0][4]  # Highest final_score
-            if max_score > 0:
-                normalized_results = [
-                    (chunk, bm25, vec, boost, score / max_score)
-                    for chunk, bm25, vec, boost, score in final_results
-                ]
-            else:
-                normalized_results = final_results
-        else:
-            normalized_results = []
-
-        # Convert to SearchResult objects with threshold filtering
-        search_results = []
-        above_threshold = []
-        below_threshold = []
-
-        for chunk, bm25_score, vector_score, metadata_boost, final_score in normalized_results:
-            doc = self.bm25_engine.get_document(chunk.doc_id)
-            if not doc:
-                continue
-
-            search_result = SearchResult(
-                chunk=chunk,
-                document=doc,
-                bm25_score=bm25_score,
-                vector_score=vector_score,
-                metadata_boost=metadata_boost,
-                final_score=final_score,
-                match_highlights=self._extract_highlights(chunk, structured_query)
-            )
-
-            if final_score >= score_threshold:
-                above_threshold.append(search_result)
-            else:
-                below_threshold.append(search_result)
+        final_scores = table.scores[:, ScoreTable.FINAL]
+        if len(table) and final_scores[0] > 0:  # Highest final_score
+            final_scores /= final_scores[0]
+
+        # Threshold filtering on the score column (chunks whose document is
+        # gone are skipped)
+        docs = [self.bm25_engine.get_document(chunk.doc_id) for chunk in table.chunks]
+        has_doc = np.array([doc is not None for doc in docs], dtype=bool)
+        passes = final_scores >= score_threshold
+        above_threshold = np.flatnonzero(has_doc & passes)
+        below_threshold = np.flatnonzero(has_doc & ~passes)
 
         if strict_threshold:
-            search_results = above_threshold[:max_results]
+            selected = above_threshold[:max_results]
         else:
             # Apply smart filtering:
             # 1. If we have enough above threshold, use those (up to max)
             # 2. If below min, add from below threshold to reach min
             # 3. Never exceed max
             if len(above_threshold) >= min_results:
-                search_results = above_threshold[:max_results]
+                selected = above_threshold[:max_results]
             else:
                 # Need to add some below threshold to reach min
                 needed = min(min_results - len(above_threshold), len(below_threshold))
-                search_results = above_threshold + below_threshold[:needed]
-                search_results = search_results[:max_results]
+                selected = np.concatenate([above_threshold, below_threshold[:needed]])
+                selected = selected[:max_results]
+
+        # Convert only the returned rows to SearchResult objects
+        query_tokens = frozenset(self.bm25_engine.tokenize(structured_query.text_query))
+        search_results = []
+        for row in selected.tolist():
+            chunk = table.chunks[row]
+            bm25_score, vector_score, metadata_boost, final_score = table.scores[row].tolist()
+
+            # chunk and doc are already-validated models; skip re-validation
+            search_results.append(SearchResult.model_construct(
+                chunk=chunk,
+                document=docs[row],
+                bm25_score=bm25_score,
+                vector_score=vector_score,
+                metadata_boost=metadata_boost,
+                final_score=final_score,
+                match_highlights=self._extract_highlights(chunk, query_tokens)
+            ))
 
         logger.info(
             f"Returning {len(search_results)} results "
@@ -178,16 +244,16 @@ class HybridSearchEngine:
 
     def _vector_search_with_filters(
         self,
-        query: SearchQuery
+        query: SearchQuery,
+        candidate_doc_ids: Optional[List[str]]
     ) -> List[Tuple[EnrichedChunk, float]]:
         """
         Perform vector search with metadata filters
 
         Note: This wraps the existing vector search from knowledge_indexer
-        and applies the same filters as BM25 search
+        and applies the same filters as BM25 search (candidate_doc_ids is
+        the bm25_engine._apply_filters() result)
         """
-        # Get candidate doc IDs from filters
-        candidate_doc_ids = self.bm25_engine._apply_filters(query)
 
         # Perform vector search using knowledge_indexer
         try:
@@ -206,7 +272,7 @@ class HybridSearchEngine:
         bm25_results: List[Tuple[EnrichedChunk, float]],
         vector_results: List[Tuple[EnrichedChunk, float]],
         k: int = 60
-    ) -> List[Tuple[EnrichedChunk, float, float, float, float]]:
+    ) -> ScoreTable:
         """
         Fuse BM25 and vector results using weighted score combination
 
@@ -216,72 +282,59 @@ class HybridSearchEngine:
         3. This preserves actual score magnitudes (better relevance distinction)
 
         Returns:
-            List of (chunk, bm25_score, vector_score, metadata_boost=0, final_score)
+            ScoreTable sorted by final score (metadata_boost=0 until boosting)
         """
-        # Normalize BM25 scores to 0-1
-        if bm25_results:
-            max_bm25 = max(score for _, score in bm25_results)
-            bm25_normalized = {
-                chunk.chunk_id: (chunk, score / max_bm25 if max_bm25 > 0 else 0.0)
-                for chunk, score in bm25_results
-            }
-        else:
-            bm25_normalized = {}
-
-        # Normalize Vector scores to 0-1
-        if vector_results:
-            max_vector = max(score for _, score in vector_results)
-            vector_normalized = {
-                chunk.chunk_id: (chunk, score / max_vector if max_vector > 0 else 0.0)
-                for chunk, score in vector_results
-            }
-        else:
-            vector_normalized = {}
-
-        # Get all unique chunks
-        all_chunk_ids = set(bm25_normalized.keys()) | set(vector_normalized.keys())
-
-        # Combine scores with weighted average
-        fused = []
-        chunk_map = {}
-
-        # Build chunk lookup
-        for chunk_id in all_chunk_ids:
-            if chunk_id in bm25_normalized:
-                chunk_map[chunk_id] = bm25_normalized[chunk_id][0]
-            elif chunk_id in vector_normalized:
-                chunk_map[chunk_id] = vector_normalized[chunk_id][0]
-
-        for chunk_id in all_chunk_ids:
-            chunk = chunk_map[chunk_id]
-
-            # Get normalized scores (0 if not present)
-            bm25_score = bm25_normalized.get(chunk_id, (None, 0.0))[1]
-            vector_score = vector_normalized.get(chunk_id, (None, 0.0))[1]
-
-            # Weighted combination (preserves score magnitudes)
-            combined_score = self.bm25_weight * bm25_score + self.vector_weight * vector_score
-
-            fused.append((
-                chunk,
-                float(bm25_score),
-                float(vector_score),
-                0.0,  # metadata_boost (applied later)
-                combined_score  # initial final_score
-            ))
-
-        # Sort by combined score
-        fused.sort(key=lambda x: x[4], reverse=True)
+        # One row per unique chunk: BM25 hits first, then vector-only hits
+        bm25_ids = [chunk.chunk_id for chunk, _ in bm25_results]
+        vector_ids = [chunk.chunk_id for chunk, _ in vector_results]
+        rows = {chunk_id: row for row, chunk_id in enumerate(dict.fromkeys(bm25_ids + vector_ids))}
+
+        # Chunk lookup (BM25's chunk object wins when both retrieved it)
+        chunks: List[Optional[EnrichedChunk]] = [None] * len(rows)
+        for chunk, _ in vector_results:
+            chunks[rows[chunk.chunk_id]] = chunk
+        for chunk, _ in bm25_results:
+            chunks[rows[chunk.chunk_id]] = chunk
+
+        # Normalize BM25 and vector scores to 0-1 (0 if not present)
+        bm25_scores = self._normalized_scores(bm25_results, bm25_ids, rows)
+        vector_scores = self._normalized_scores(vector_results, vector_ids, rows)
+
+        # Weighted combination (preserves score magnitudes)
+        combined = self.bm25_weight * bm25_scores + self.vector_weight * vector_scores
+
+        # metadata_boost is applied later
+        table = ScoreTable(
+            chunks,
+            np.column_stack([bm25_scores, vector_scores, np.zeros(len(chunks)), combined])
+        )
 
-        return fused
+        # Sort by combined score (stable, so ties keep retrieval order)
+        table.sort_head(len(table))
+        return table
+
+    @staticmethod
+    def _normalized_scores(
+        results: List[Tuple[EnrichedChunk, float]],
+        chunk_ids: List[str],
+        rows: Dict[str, int]
+    ) -> np.ndarray:
+        """Scores divided by their max, scattered into the fused rows"""
+        normalized = np.zeros(len(rows))
+        if results:
+            scores = np.array([score for _, score in results], dtype=np.float64)
+            max_score = scores.max()
+            if max_score > 0:
+                normalized[[rows[chunk_id] for chunk_id in chunk_ids]] = scores / max_score
+        return normalized
 
     def _apply_metadata_boosting(
         self,
-        results: List[Tuple[EnrichedChunk, float, float, float, float]],
+        table: ScoreTable,
         query: SearchQuery
-    ) -> List[Tuple[EnrichedChunk, float, float, float, float]]:
+    ) -> None:
         """
-        Apply metadata-based score boosting
+        Apply metadata-based score boosting to the table in place
 
         Boosts:
         - Headers and definitions (if boost_headers enabled)
@@ -289,56 +342,61 @@ class HybridSearchEngine:
         - Signed/executed documents (if boost_signed_docs enabled)
         - Chunks with dates/money (for financial queries)
         """
-        boosted = []
+        if not len(table):
+            return
 
-        for chunk, bm25_score, vector_score, _, base_score in results:
-            boost = 1.0
+        chunks = table.chunks
+        header, definition, dates, money = self.bm25_engine.get_chunk_flags(chunks).T
 
-            # Boost headers
-            if query.boost_headers and chunk.is_header:
-                boost *= self.boost_factors["is_header"]
+        # Query-dependent switches, evaluated once rather than per chunk
+        query_lower = query.text_query.lower()
+        wants_dates = "date" in query_lower or "when" in query_lower
+        wants_money = "$" in query.text_query or "pay" in query_lower
 
-            # Boost definitions
-            if chunk.is_definition:
-                boost *= self.boost_factors["is_definition"]
+        # Document-level flags from the engine's per-document columns
+        versions, effective_dates = self.bm25_engine.get_document_columns(chunks)
+        signed = np.isin(versions, [DocumentVersion.SIGNED.value, DocumentVersion.EXECUTED.value])
+        # Less than 1 year old (NaT, i.e. no date, compares False)
+        recent = effective_dates > np.datetime64(datetime.now() - timedelta(days=365))
 
-            # Boost chunks with dates/money (context-dependent)
-            if chunk.contains_dates and ("date" in query.text_query.lower() or "when" in query.text_query.lower()):
-                boost *= self.boost_factors["contains_dates"]
-            if chunk.contains_money and ("$" in query.text_query or "pay" in query.text_query.lower()):
-                boost *= self.boost_factors["contains_money"]
+        # Multiply factors in under boolean masks (same order as the factors
+        # are listed, so the products are reproducible)
+        boost = np.ones(len(table))
 
-            # Document-level boosts
-            doc = self.bm25_engine.get_document(chunk.doc_id)
-            if doc:
-                # Boost signed/executed documents
-                if query.boost_signed_docs and doc.version in [DocumentVersion.SIGNED, DocumentVersion.EXECUTED]:
-                    boost *= self.boost_factors["signed_doc"]
+        # Boost headers
+        if query.boost_headers:
+            boost[header] *= self.boost_factors["is_header"]
 
-                # Boost recent documents
-                if query.boost_recent and doc.effective_date:
-                    days_old = (datetime.now() - doc.effective_date).days
-                    if days_old < 365:  # Less than 1 year old
-                        boost *= self.boost_factors["recent_doc"]
+        # Boost definitions
+        boost[definition] *= self.boost_factors["is_definition"]
 
-            # Calculate final score
-            final_score = base_score * boost
-            metadata_boost = boost
+        # Boost chunks with dates/money (context-dependent)
+        if wants_dates:
+            boost[dates] *= self.boost_factors["contains_dates"]
+        if wants_money:
+            boost[money] *= self.boost_factors["contains_money"]
 
-            boosted.append((chunk, bm25_score, vector_score, metadata_boost, final_score))
+        # Document-level boosts
+        if query.boost_signed_docs:
+            boost[signed] *= self.boost_factors["signed_doc"]
+        if query.boost_recent:
+            boost[recent] *= self.boost_factors["recent_doc"]
 
-        # Re-sort by final score
-        boosted.sort(key=lambda x: x[4], reverse=True)
+        # Calculate final score
+        table.scores[:, ScoreTable.BOOST] = boost
+        table.scores[:, ScoreTable.FINAL] *= boost
 
-        return boosted
+        # Re-sort by final score (stable, like list.sort)
+        table.sort_head(len(table))
 
     def _cross_encoder_rerank(
         self,
         query: str,
-        results: List[Tuple[EnrichedChunk, float, float, float, float]]
-    ) -> List[Tuple[EnrichedChunk, float, float, float, float]]:
+        table: ScoreTable,
+        top_k: int = 20
+    ) -> None:
         """
-        Rerank top results using cross-encoder
+        Rerank the table's top_k rows in place using cross-encoder
 
         Cross-encoders jointly encode query and document,
         providing more accurate relevance scores than bi-encoders.
@@ -346,64 +404,81 @@ class HybridSearchEngine:
         Note: This is computationally expensive, so only apply to top-k.
         """
         if not self.cross_encoder:
-            return results
+            return
 
-        logger.info(f"Cross-encoder reranking {len(results)} results")
+        n = min(top_k, len(table))
 
-        # Prepare pairs for cross-encoder
-        pairs = [(query, chunk.text) for chunk, *_ in results]
+        # Prepare pairs for cross-encoder, longest text first so each batch
+        # pads to similar lengths
+        pairs = [(query, chunk.text) for chunk in table.chunks[:n]]
+        logger.info(f"Cross-encoder reranking {len(pairs)} results")
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][1]), reverse=True)
 
         # Get cross-encoder scores
         try:
+            # torch ships with sentence-transformers; only needed once a
+            # cross-encoder has been loaded
+            import torch
+
             # Assuming cross-encoder is sentence-transformers CrossEncoder
-            ce_scores = self.cross_encoder.predict(pairs)
+            device = getattr(self.cross_encoder, "_target_device", None)
+            autocast = (
+                torch.autocast(device_type="cuda", dtype=torch.float16)
+                if device is not None and device.type == "cuda"
+                else contextlib.nullcontext()
+            )
+            with torch.inference_mode(), autocast:
+                sorted_scores = self.cross_encoder.predict(
+                    [pairs[i] for i in order],
+                    batch_size=self.CROSS_ENCODER_BATCH_SIZE,
+                    show_progress_bar=False,
+                    convert_to_numpy=True
+                )
         except Exception as e:
             logger.error(f"Cross-encoder failed: {e}")
-            return results
-
-        # Update final scores with cross-encoder
-        reranked = []
-        for idx, (chunk, bm25_score, vector_score, metadata_boost, base_score) in enumerate(results):
-            ce_score = float(ce_scores[idx])
+            return
 
-            # Combine: weighted average of RRF score and cross-encoder score
-            final_score = 0.7 * ce_score + 0.3 * base_score
+        # Back to the order of results
+        ce_scores = np.empty(len(order))
+        ce_scores[order] = sorted_scores
 
-            reranked.append((chunk, bm25_score, vector_score, metadata_boost, final_score))
+        # Combine: weighted average of RRF score and cross-encoder score
+        final_scores = table.scores[:n, ScoreTable.FINAL]
+        final_scores[:] = 0.7 * ce_scores + 0.3 * final_scores
 
         # Sort by new final score
-        reranked.sort(key=lambda x: x[4], reverse=True)
+        table.sort_head(n)
 
         logger.info("Cross-encoder reranking complete")
-        return reranked
 
     def _extract_highlights(
         self,
         chunk: EnrichedChunk,
-        query: SearchQuery
+        query_tokens: frozenset
     ) -> List[str]:
         """
         Extract highlighted snippets showing query match
 
+        Args:
+            chunk: Result chunk
+            query_tokens: Tokenized query text (tokenized once per search)
+
         Returns list of text snippets with matched terms in context
         """
-        query_tokens = set(self.bm25_engine.tokenize(query.text_query))
-        chunk_tokens = self.bm25_engine.tokenize(chunk.text)
-
-        # Find matching tokens
-        matches = query_tokens & set(chunk_tokens)
+        # Find matching tokens (term_frequencies holds the chunk's tokens
+        # from BM25 indexing; tokenize only if it was never indexed)
+        chunk_tokens = chunk.term_frequencies or self.bm25_engine.tokenize(chunk.text)
+        matches = query_tokens.intersection(chunk_tokens)
 
         if not matches:
             # Return first 200 chars as fallback
             return [chunk.text[:200] + "..."]
 
-        # Find sentences with matches
-        sentences = chunk.text.split('. ')
+        # Find sentences with matches (split only as far as needed)
         highlights = []
 
-        for sentence in sentences:
-            sentence_tokens = set(self.bm25_engine.tokenize(sentence))
-            if sentence_tokens & matches:
+        for sentence in _iter_sentences(chunk.text):
+            if not matches.isdisjoint(self.bm25_engine.tokenize(sentence)):
                 highlights.append(sentence.strip())
                 if len(highlights) >= 3:
                     break
@@ -5,16 +5,19 @@ Builds structured knowledge base with BM25 + Vector indexes
 from pathlib import Path
 from typing import Dict, List, Optional, Set
 import logging
-import hashlib
-import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 import numpy as np
+import orjson
 import faiss
 from sentence_transformers import SentenceTransformer
 
 from backend.models.knowledge_schema import StructuredDocument, EnrichedChunk
-from backend.services.advanced_parser import LegalDocumentParser
+from backend.services.advanced_parser import compute_file_hash, get_parser
 from backend.services.bm25_search import BM25SearchEngine
 from backend.config import settings
 
@@ -35,6 +38,31 @@ class KnowledgeIndexer:
     into a queryable, metadata-rich knowledge base.
     """
 
+    # Query embeddings kept for repeated queries (retries, follow-ups)
+    QUERY_CACHE_SIZE = 1024
+    # Chunks per forward pass when embedding the corpus
+    EMBEDDING_BATCH_SIZE = 128
+    # Parsed chunks collected before embedding them during indexing (a few
+    # batches, so encode() still has lengths to sort)
+    EMBEDDING_PIPELINE_CHUNKS = 4 * EMBEDDING_BATCH_SIZE
+
+    # Vector index by corpus size: exact flat scan below HNSW_MIN_VECTORS,
+    # HNSW graph below IVF_PQ_MIN_VECTORS, IVF-PQ (compressed) above.
+    # Flat and HNSW store vectors as fp16, which halves their memory for
+    # score changes around 1e-4 on unit vectors
+    HNSW_MIN_VECTORS = 10_000
+    IVF_PQ_MIN_VECTORS = 100_000
+    HNSW_M = 32
+    HNSW_EF_CONSTRUCTION = 200
+    HNSW_EF_SEARCH = 64
+    IVF_LISTS = 256
+    IVF_NPROBE = 16
+    PQ_SUBQUANTIZERS = 32
+    # Filters matching at most this many chunks are scored exactly rather
+    # than through the approximate index, whose recall drops when most
+    # candidates are filtered out
+    EXACT_FILTER_MAX_ROWS = 10_000
+
     def __init__(self, data_dir: Path = None):
         """
         Initialize indexer
@@ -46,14 +74,24 @@ class KnowledgeIndexer:
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
         # Components
-        self.parser = LegalDocumentParser()
+        self.parser = get_parser(self.data_dir / "parse_cache")
         self.bm25_engine = BM25SearchEngine()
         self.embedding_model = None
         self.faiss_index = None
+        # GPU copy of faiss_index for unfiltered searches (USE_GPU_INDEX);
+        # GPU indexes aren't safe for concurrent searches, hence the lock
+        self._gpu_resources = None
+        self._gpu_index = None
+        self._gpu_lock = threading.Lock()
 
         # Storage
         self.documents: List[StructuredDocument] = []
         self.chunks: List[EnrichedChunk] = []
+        # doc_id -> FAISS row ids of its chunks (rows follow self.chunks)
+        self._chunk_rows_by_doc: Dict[str, np.ndarray] = {}
+        # query text -> embedding, least recently used first
+        self._query_embeddings: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_embeddings_lock = threading.Lock()
 
         # Paths
         self.docs_file = self.data_dir / "structured_documents.json"
@@ -66,8 +104,20 @@ class KnowledgeIndexer:
         if not self.embedding_model:
             logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
             self.embedding_model = SentenceTransformer(settings.EMBEDDING_MODEL)
+            self._query_embeddings.clear()
             logger.info("Embedding model loaded")
 
+    def warmup(self):
+        """
+        Run one throwaway query embedding
+
+        The first encode() pays lazy tokenizer/torch initialization; doing it
+        at startup keeps that cost off the first user query.
+        """
+        if self.embedding_model:
+            self.embedding_model.encode(["warmup"], convert_to_numpy=True)
+            logger.info("Embedding model warmed up")
+
     def index_directory(
         self,
         doc_dir: Path,
@@ -137,44 +187,79 @@ class KnowledgeIndexer:
         skipped = 0
         errors = 0
 
-        for file_path in all_files:
-            try:
-                # Check if already indexed (by hash)
-                file_hash = self._compute_file_hash(file_path)
-
-                if not force_reindex and file_hash in existing_docs_by_hash:
-                    existing_doc = existing_docs_by_hash[file_hash]
-
-                    if file_hash in removed_hashes:
-                        logger.info(f"Skipping (already indexed): {file_path.name}")
-                        existing_doc.source_folder = str(target_folder)
-                        new_documents.append(existing_doc)
-                    else:
-                        logger.info(
-                            "Skipping duplicate from another folder: %s", file_path.name
-                        )
-
-                    skipped += 1
-                    continue
-
-                # Parse document
-                logger.info(f"Parsing: {file_path.name}")
-                structured_doc = self.parser.parse_document(file_path)
-
-                if structured_doc:
-                    structured_doc.source_folder = str(target_folder)
-                    new_documents.append(structured_doc)
+        # Hash every file up front (hashlib releases the GIL, so threads
+        # overlap the reads), then parse the changed ones across processes
+        file_hashes = self._hash_files(all_files)
+
+        # Reused documents and paths to parse, in file order
+        slots: List = []
+        to_parse: List[Path] = []
+
+        for file_path, file_hash in zip(all_files, file_hashes):
+            if file_hash is None:
+                errors += 1
+                continue
+
+            # Check if already indexed (by hash)
+            if not force_reindex and file_hash in existing_docs_by_hash:
+                existing_doc = existing_docs_by_hash[file_hash]
+
+                if file_hash in removed_hashes:
+                    logger.info(f"Skipping (already indexed): {file_path.name}")
+                    existing_doc.source_folder = str(target_folder)
+                    slots.append(existing_doc)
+                else:
                     logger.info(
-                        f"Parsed {file_path.name}: "
-                        f"{len(structured_doc.chunks)} chunks, "
-                        f"{structured_doc.total_sections} sections"
+                        "Skipping duplicate from another folder: %s", file_path.name
                     )
-                else:
-                    logger.warning(f"Failed to parse: {file_path.name}")
-                    errors += 1
 
-            except Exception as e:
-                logger.error(f"Error parsing {file_path.name}: {e}")
+                skipped += 1
+                continue
+
+            slots.append(file_path)
+            to_parse.append(file_path)
+
+        # Parse documents (parse_document logs and returns None on failure).
+        # Chunks are embedded as parsed documents arrive, so the model works
+        # while the worker processes parse the remaining files.
+        logger.info(f"Parsing {len(to_parse)} documents...")
+        parsed: Dict[Path, Optional[StructuredDocument]] = {}
+        embeddings: Dict[int, np.ndarray] = {}
+        pending: List[StructuredDocument] = []
+        pending_chunks = 0
+
+        # A forced reindex must not be served stale results from the parse cache
+        parse_iter = self.parser.iter_parse_batch(to_parse, use_cache=not force_reindex)
+        for structured_doc, file_path in zip(parse_iter, to_parse):
+            parsed[file_path] = structured_doc
+            if structured_doc and structured_doc.chunks:
+                pending.append(structured_doc)
+                pending_chunks += len(structured_doc.chunks)
+                if pending_chunks >= self.EMBEDDING_PIPELINE_CHUNKS:
+                    embeddings.update(self._embed_documents(pending))
+                    pending = []
+                    pending_chunks = 0
+
+        embeddings.update(self._embed_documents(pending))
+
+        for slot in slots:
+            if isinstance(slot, StructuredDocument):
+                new_documents.append(slot)
+                continue
+
+            file_path = slot
+            structured_doc = parsed[file_path]
+
+            if structured_doc:
+                structured_doc.source_folder = str(target_folder)
+                new_documents.append(structured_doc)
+                logger.info(
+                    f"Parsed {file_path.name}: "
+                    f"{len(structured_doc.chunks)} chunks, "
+                    f"{structured_doc.total_sections} sections"
+                )
+            else:
+                logger.warning(f"Failed to parse: {file_path.name}")
                 errors += 1
 
         if not new_documents:
@@ -197,7 +282,7 @@ class KnowledgeIndexer:
 
         # 2. Build FAISS vector index
         logger.info("Building FAISS vector index...")
-        self._build_vector_index()
+        self._build_vector_index(embeddings)
 
         # 3. Save everything
         logger.info("Saving indexes...")
@@ -217,54 +302,221 @@ class KnowledgeIndexer:
         logger.info(f"Indexing complete: {stats}")
         return stats
 
-    def _build_vector_index(self):
-        """Build FAISS vector index from enriched chunks"""
+    def _build_vector_index(self, embeddings: Optional[Dict[int, np.ndarray]] = None):
+        """
+        Build FAISS vector index from enriched chunks
+
+        Args:
+            embeddings: Optional chunk embeddings already computed for some
+                documents, keyed by id() of the document
+        """
         # Collect all chunks
         self.chunks = []
         for doc in self.documents:
             self.chunks.extend(doc.chunks)
+        self._map_chunk_rows()
 
         if not self.chunks:
             logger.warning("No chunks to index")
             self.faiss_index = None
+            self._refresh_gpu_index()
             return
 
-        logger.info(f"Generating embeddings for {len(self.chunks)} chunks...")
+        embeddings = dict(embeddings or {})
+        missing = [
+            doc for doc in self.documents if doc.chunks and id(doc) not in embeddings
+        ]
+        logger.info(
+            f"Generating embeddings for {sum(len(doc.chunks) for doc in missing)} chunks..."
+        )
+        embeddings.update(self._embed_documents(missing))
+
+        embeddings_matrix = np.concatenate(
+            [embeddings[id(doc)] for doc in self.documents if doc.chunks]
+        )
+        logger.info(f"Embeddings shape: {embeddings_matrix.shape}")
 
-        # Generate embeddings in batches
-        batch_size = 32
-        all_embeddings = []
+        self.faiss_index = self._create_faiss_index(embeddings_matrix)
+        self._refresh_gpu_index()
+
+        logger.info(f"FAISS index built with {self.faiss_index.ntotal} vectors")
 
-        for i in range(0, len(self.chunks), batch_size):
-            batch_chunks = self.chunks[i:i + batch_size]
-            batch_texts = [chunk.text for chunk in batch_chunks]
+    def _embed_documents(
+        self,
+        documents: List[StructuredDocument]
+    ) -> Dict[int, np.ndarray]:
+        """Embeddings of each document's chunks, keyed by id() of the document"""
+        if not documents:
+            return {}
+
+        embeddings = self._embed_chunks([chunk for doc in documents for chunk in doc.chunks])
+        offsets = np.cumsum([len(doc.chunks) for doc in documents])[:-1]
+        return {
+            id(doc): doc_embeddings
+            for doc, doc_embeddings in zip(documents, np.split(embeddings, offsets))
+        }
 
-            # Generate embeddings
-            embeddings = self.embedding_model.encode(
-                batch_texts,
+    def _embed_chunks(self, chunks: List[EnrichedChunk]) -> np.ndarray:
+        """(len(chunks), d) float32 unit-length embeddings of chunk texts"""
+        # One call: encode() sorts the whole list by length before
+        # batching, so batches carry little padding
+        return np.ascontiguousarray(
+            self.embedding_model.encode(
+                [chunk.text for chunk in chunks],
+                batch_size=self.EMBEDDING_BATCH_SIZE,
                 show_progress_bar=False,
-                convert_to_numpy=True
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            ),
+            dtype=np.float32
+        )
+
+    @classmethod
+    def _create_faiss_index(cls, embeddings: np.ndarray):
+        """
+        Inner-product index over unit-length embeddings, sized to the corpus
+
+        With normalized vectors the inner product is the cosine similarity,
+        so search results need no distance-to-similarity conversion.
+        """
+        count, dimension = embeddings.shape
+
+        if count >= cls.IVF_PQ_MIN_VECTORS and dimension % cls.PQ_SUBQUANTIZERS == 0:
+            index = faiss.index_factory(
+                dimension,
+                f"IVF{cls.IVF_LISTS},PQ{cls.PQ_SUBQUANTIZERS}",
+                faiss.METRIC_INNER_PRODUCT
+            )
+            index.train(embeddings)
+            index.nprobe = cls.IVF_NPROBE
+            # reconstruct() is needed for exact scans of filtered rows
+            index.make_direct_map()
+        elif count >= cls.HNSW_MIN_VECTORS:
+            index = faiss.IndexHNSWSQ(
+                dimension, faiss.ScalarQuantizer.QT_fp16, cls.HNSW_M, faiss.METRIC_INNER_PRODUCT
+            )
+            index.hnsw.efConstruction = cls.HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = cls.HNSW_EF_SEARCH
+        else:
+            index = faiss.IndexScalarQuantizer(
+                dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT
             )
 
-            # Store embeddings in chunks
-            for chunk, embedding in zip(batch_chunks, embeddings):
-                chunk.embedding_vector = embedding.tolist()
+        # No-op for fp16 (fixed range), but the index must be marked trained
+        if not index.is_trained:
+            index.train(embeddings)
+        index.add(embeddings)
+        return index
 
-            all_embeddings.append(embeddings)
+    def _prune_vector_index(self, old_documents: List[StructuredDocument]) -> bool:
+        """
+        Rebuild the vector index for self.documents from existing vectors
 
-            if (i + batch_size) % 100 == 0:
-                logger.info(f"Processed {i + batch_size}/{len(self.chunks)} chunks")
+        FAISS rows follow the chunks of old_documents in order, so the rows
+        of documents still present are reconstructed from the index rather
+        than re-embedded. Only lossless indexes qualify: rebuilding from
+        PQ-decoded vectors would compound quantization error on every
+        removal (and carry it into the exact tiers).
 
-        # Concatenate all embeddings
-        embeddings_matrix = np.vstack(all_embeddings).astype('float32')
-        logger.info(f"Embeddings shape: {embeddings_matrix.shape}")
+        Args:
+            old_documents: Documents the current index was built from
 
-        # Build FAISS index
-        dimension = embeddings_matrix.shape[1]
-        self.faiss_index = faiss.IndexFlatL2(dimension)
-        self.faiss_index.add(embeddings_matrix)
+        Returns:
+            False if the index is lossy or doesn't line up with
+            old_documents (the caller should rebuild from scratch)
+        """
+        if (
+            self.faiss_index is None
+            or not self._stores_exact_vectors(self.faiss_index)
+            or self.faiss_index.ntotal != sum(len(doc.chunks) for doc in old_documents)
+        ):
+            return False
 
-        logger.info(f"FAISS index built with {self.faiss_index.ntotal} vectors")
+        kept = {id(doc) for doc in self.documents}
+        keep_rows = []
+        row = 0
+        for doc in old_documents:
+            if id(doc) in kept:
+                keep_rows.append(np.arange(row, row + len(doc.chunks), dtype=np.int64))
+            row += len(doc.chunks)
+
+        keep_rows = np.concatenate(keep_rows) if keep_rows else np.zeros(0, dtype=np.int64)
+        if len(keep_rows):
+            try:
+                vectors = self.faiss_index.reconstruct_batch(keep_rows)
+            except RuntimeError as e:
+                logger.warning(f"Cannot reuse vectors from the FAISS index: {e}")
+                return False
+
+        self.chunks = [chunk for doc in self.documents for chunk in doc.chunks]
+        self._map_chunk_rows()
+        self.faiss_index = self._create_faiss_index(vectors) if len(keep_rows) else None
+        self._refresh_gpu_index()
+
+        logger.info(f"FAISS index pruned to {len(keep_rows)} vectors")
+        return True
+
+    @staticmethod
+    def _stores_exact_vectors(index) -> bool:
+        """Whether reconstruct() returns the vectors as added (flat or fp16 storage)"""
+        if isinstance(index, faiss.IndexHNSW):
+            storage = faiss.downcast_index(index.storage)
+            return KnowledgeIndexer._stores_exact_vectors(storage)
+        if isinstance(index, faiss.IndexScalarQuantizer):
+            return index.sq.qtype == faiss.ScalarQuantizer.QT_fp16
+        return isinstance(index, faiss.IndexFlat)
+
+    def _refresh_gpu_index(self):
+        """
+        Copy faiss_index to the GPU when USE_GPU_INDEX is set and a GPU is
+        available (otherwise, or if the copy fails, searches stay on CPU)
+
+        IVF-PQ is cloned as is; the flat and HNSW tiers become an exact
+        fp16 flat index on the GPU, which below the IVF-PQ threshold is
+        faster than either on CPU.
+        """
+        self._gpu_index = None
+        if (
+            not settings.USE_GPU_INDEX
+            or self.faiss_index is None
+            or not hasattr(faiss, 'StandardGpuResources')
+            or faiss.get_num_gpus() == 0
+        ):
+            return
+
+        try:
+            if self._gpu_resources is None:
+                self._gpu_resources = faiss.StandardGpuResources()
+
+            if isinstance(self.faiss_index, faiss.IndexIVF):
+                options = faiss.GpuClonerOptions()
+                options.useFloat16 = True
+                gpu_index = faiss.index_cpu_to_gpu(
+                    self._gpu_resources, 0, self.faiss_index, options
+                )
+                gpu_index.nprobe = self.IVF_NPROBE
+            else:
+                config = faiss.GpuIndexFlatConfig()
+                config.useFloat16 = True
+                gpu_index = faiss.GpuIndexFlatIP(
+                    self._gpu_resources, self.faiss_index.d, config
+                )
+                gpu_index.add(self.faiss_index.reconstruct_n(0, self.faiss_index.ntotal))
+
+            self._gpu_index = gpu_index
+            logger.info(f"FAISS index copied to GPU ({self.faiss_index.ntotal} vectors)")
+        except Exception as e:
+            logger.warning(f"Could not move FAISS index to GPU, searching on CPU: {e}")
+
+    def _map_chunk_rows(self):
+        """Group FAISS row ids (positions in self.chunks) by document"""
+        rows_by_doc: Dict[str, List[int]] = {}
+        for row, chunk in enumerate(self.chunks):
+            rows_by_doc.setdefault(chunk.doc_id, []).append(row)
+        self._chunk_rows_by_doc = {
+            doc_id: np.array(rows, dtype=np.int64)
+            for doc_id, rows in rows_by_doc.items()
+        }
 
     def _save_indexes(self):
         """Save all indexes and metadata to disk"""
@@ -272,19 +524,17 @@ class KnowledgeIndexer:
 
         # 1. Save structured documents
         docs_data = [doc.dict() for doc in self.documents]
-        with open(self.docs_file, 'w', encoding='utf-8') as f:
-            json.dump(docs_data, f, indent=2, default=str)
+        self.docs_file.write_bytes(self._dump_json(docs_data))
         logger.info(f"Saved {len(docs_data)} documents to {self.docs_file}")
 
         # 2. Save enriched chunks
         chunks_data = [chunk.dict() for chunk in self.chunks]
-        with open(self.chunks_file, 'w', encoding='utf-8') as f:
-            json.dump(chunks_data, f, indent=2, default=str)
+        self.chunks_file.write_bytes(self._dump_json(chunks_data))
         logger.info(f"Saved {len(chunks_data)} chunks to {self.chunks_file}")
 
         # 3. Save FAISS index
         if self.faiss_index:
-            faiss.write_index(self.faiss_index, str(self.faiss_index_file))
+            self._write_faiss_index()
             logger.info(f"Saved FAISS index to {self.faiss_index_file}")
 
         # 4. Save BM25 index
@@ -292,6 +542,45 @@ class KnowledgeIndexer:
         self.bm25_engine.save_index(self.bm25_dir)
         logger.info(f"Saved BM25 index to {self.bm25_dir}")
 
+        # 5. Drop parse cache entries of files no longer indexed
+        pruned = self.parser.prune_cache({doc.file_hash for doc in self.documents})
+        if pruned:
+            logger.info(f"Pruned {pruned} stale parse cache entries")
+
+    @staticmethod
+    def _dump_json(data) -> bytes:
+        """
+        Encode documents/chunks for disk
+
+        orjson writes datetimes and enums natively (naive datetimes stay
+        naive, so they load back unchanged); anything else falls back to str
+        as the old json.dump(default=str) did.
+        """
+        return orjson.dumps(data, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def _read_faiss_index(self):
+        """
+        Read the FAISS index, memory-mapped where supported
+
+        A loaded index is only searched, never added to, so it is opened
+        read-only and mapped: IVF inverted lists stay in the shared page
+        cache instead of being copied into each process. Windows keeps the
+        plain read, since a mapped file there can't be replaced on re-index.
+        """
+        if os.name == 'nt':
+            return faiss.read_index(str(self.faiss_index_file))
+        return faiss.read_index(
+            str(self.faiss_index_file), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        )
+
+    def _write_faiss_index(self):
+        """Write the FAISS index next to the old file, then swap it in"""
+        # Replacing rather than truncating leaves a still-mapped old index
+        # readable until its last search finishes
+        tmp_file = self.faiss_index_file.with_name(self.faiss_index_file.name + ".tmp")
+        faiss.write_index(self.faiss_index, str(tmp_file))
+        os.replace(tmp_file, self.faiss_index_file)
+
     def load_indexes(self) -> bool:
         """
         Load existing indexes from disk
@@ -307,8 +596,7 @@ class KnowledgeIndexer:
                 logger.warning(f"Documents file not found: {self.docs_file}")
                 return False
 
-            with open(self.docs_file, 'r', encoding='utf-8') as f:
-                docs_data = json.load(f)
+            docs_data = orjson.loads(self.docs_file.read_bytes())
 
             self.documents = [StructuredDocument(**doc) for doc in docs_data]
             logger.info(f"Loaded {len(self.documents)} documents")
@@ -318,10 +606,10 @@ class KnowledgeIndexer:
                 logger.warning(f"Chunks file not found: {self.chunks_file}")
                 return False
 
-            with open(self.chunks_file, 'r', encoding='utf-8') as f:
-                chunks_data = json.load(f)
+            chunks_data = orjson.loads(self.chunks_file.read_bytes())
 
             self.chunks = [EnrichedChunk(**chunk) for chunk in chunks_data]
+            self._map_chunk_rows()
             logger.info(f"Loaded {len(self.chunks)} chunks")
 
             # 3. Load FAISS index
@@ -329,7 +617,7 @@ class KnowledgeIndexer:
                 logger.warning(f"FAISS index not found: {self.faiss_index_file}")
                 return False
 
-            self.faiss_index = faiss.read_index(str(self.faiss_index_file))
+            self.faiss_index = self._read_faiss_index()
             logger.info(f"Loaded FAISS index with {self.faiss_index.ntotal} vectors")
 
             # 4. Load BM25 index
@@ -343,6 +631,15 @@ class KnowledgeIndexer:
             # 5. Load embedding model
             self.initialize_models()
 
+            # Indexes saved before the switch to cosine similarity hold raw
+            # L2 vectors; re-embed once so scores mean the same thing
+            if self.faiss_index.metric_type != faiss.METRIC_INNER_PRODUCT and self.chunks:
+                logger.info("Rebuilding L2 FAISS index as an inner-product index")
+                self.faiss_index = self._create_faiss_index(self._embed_chunks(self.chunks))
+                self._write_faiss_index()
+
+            self._refresh_gpu_index()
+
             logger.info("All indexes loaded successfully")
             return True
 
@@ -363,20 +660,27 @@ class KnowledgeIndexer:
     def _load_all_documents(self) -> List[StructuredDocument]:
         """Load all structured documents from disk."""
         try:
-            with open(self.docs_file, 'r', encoding='utf-8') as f:
-                docs_data = json.load(f)
+            docs_data = orjson.loads(self.docs_file.read_bytes())
             return [StructuredDocument(**doc) for doc in docs_data]
         except Exception as e:
             logger.error(f"Error loading documents: {e}")
             return []
 
+    def _hash_files(self, paths: List[Path]) -> List[Optional[str]]:
+        """File hashes in input order (None where the file couldn't be read)"""
+        def hash_file(file_path: Path) -> Optional[str]:
+            try:
+                return self._compute_file_hash(file_path)
+            except Exception as e:
+                logger.error(f"Error hashing {file_path.name}: {e}")
+                return None
+
+        with ThreadPoolExecutor() as executor:
+            return list(executor.map(hash_file, paths))
+
     def _compute_file_hash(self, file_path: Path) -> str:
-        """Compute SHA-256 hash of file"""
-        hasher = hashlib.sha256()
-        with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b''):
-                hasher.update(chunk)
-        return hasher.hexdigest()
+        """Compute the file hash the parser stores on the document"""
+        return compute_file_hash(file_path)
 
     def vector_search(
         self,
@@ -395,40 +699,149 @@ class KnowledgeIndexer:
         Returns:
             List of (EnrichedChunk, similarity_score) tuples
         """
+        return self.vector_search_batch([query_text], [top_k], [filter_doc_ids])[0]
+
+    def vector_search_batch(
+        self,
+        query_texts: List[str],
+        top_ks: List[int],
+        filter_doc_ids: Optional[List[Optional[List[str]]]] = None
+    ) -> List[List[tuple]]:
+        """
+        Vector similarity search for several queries
+
+        All query embeddings come from a single encode() call; each query is
+        then searched with its own top_k and document filter.
+
+        Args:
+            query_texts: Query texts
+            top_ks: Number of results per query
+            filter_doc_ids: Optional document ID filter per query
+
+        Returns:
+            One list of (EnrichedChunk, similarity_score) tuples per query
+        """
         if not self.faiss_index or not self.embedding_model:
             logger.warning("Vector index not ready")
-            return []
+            return [[] for _ in query_texts]
+
+        query_embeddings = self._encode_queries(query_texts)
 
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(
-            [query_text],
-            convert_to_numpy=True
-        ).astype('float32')
+        return [
+            self._search_embedding(query_embeddings[i:i + 1], top_k, doc_ids)
+            for i, (top_k, doc_ids) in enumerate(
+                zip(top_ks, filter_doc_ids or [None] * len(query_texts))
+            )
+        ]
 
-        # Search FAISS
-        distances, indices = self.faiss_index.search(query_embedding, top_k * 2)
+    def _encode_queries(self, query_texts: List[str]) -> np.ndarray:
+        """
+        (len(query_texts), d) float32 query embeddings, served from the LRU
+        cache where possible; misses are encoded together in one call
+        """
+        with self._query_embeddings_lock:
+            cached = [self._query_embeddings.get(text) for text in query_texts]
+            for text, embedding in zip(query_texts, cached):
+                if embedding is not None:
+                    self._query_embeddings.move_to_end(text)
+
+        missing = list(dict.fromkeys(
+            text for text, embedding in zip(query_texts, cached) if embedding is None
+        ))
+        if missing:
+            # Generate query embeddings
+            encoded = np.ascontiguousarray(
+                self.embedding_model.encode(
+                    missing,
+                    batch_size=32,
+                    show_progress_bar=False,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True
+                ),
+                dtype='float32'
+            )
+            encoded.flags.writeable = False  # rows are shared through the cache
+            new_embeddings = dict(zip(missing, encoded))
 
-        # Convert distances to similarity scores (cosine similarity)
-        # FAISS L2 distance -> similarity
-        results = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx >= len(self.chunks):
-                continue
+            with self._query_embeddings_lock:
+                self._query_embeddings.update(new_embeddings)
+                while len(self._query_embeddings) > self.QUERY_CACHE_SIZE:
+                    self._query_embeddings.popitem(last=False)
 
-            chunk = self.chunks[idx]
+            cached = [
+                new_embeddings[text] if embedding is None else embedding
+                for text, embedding in zip(query_texts, cached)
+            ]
 
-            # Apply document filter
-            if filter_doc_ids and chunk.doc_id not in filter_doc_ids:
-                continue
+        return np.stack(cached)
 
-            # Convert L2 distance to similarity (inverse)
-            similarity = 1 / (1 + dist)
+    def _search_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        filter_doc_ids: Optional[List[str]]
+    ) -> List[tuple]:
+        """Search FAISS with one (1, d) query embedding"""
+        gpu_index = self._gpu_index
+
+        # Inner products of unit vectors are cosine similarities; FAISS
+        # returns them in descending order.
+        # Restrict the search to the filtered documents' rows inside FAISS,
+        # so a selective filter still gets its nearest chunks instead of
+        # whatever survives post-filtering the global top hits
+        if filter_doc_ids:
+            rows = [
+                self._chunk_rows_by_doc[doc_id] for doc_id in set(filter_doc_ids)
+                if doc_id in self._chunk_rows_by_doc
+            ]
+            if not rows:
+                return []
+            rows = np.sort(np.concatenate(rows))
+            if len(rows) <= self.EXACT_FILTER_MAX_ROWS:
+                similarities, indices = self._search_rows(query_embedding, top_k, rows)
+            else:
+                similarities, indices = self.faiss_index.search(
+                    query_embedding, top_k,
+                    params=self._search_params(top_k, faiss.IDSelectorBatch(rows))
+                )
+        elif gpu_index is not None:
+            # GPU indexes take no search parameters or ID selectors, so
+            # only unfiltered searches go there
+            with self._gpu_lock:
+                similarities, indices = gpu_index.search(query_embedding, top_k)
+        else:
+            similarities, indices = self.faiss_index.search(
+                query_embedding, top_k, params=self._search_params(top_k)
+            )
 
-            results.append((chunk, float(similarity)))
+        return [
+            (self.chunks[idx], similarity)
+            for similarity, idx in zip(similarities[0].tolist(), indices[0].tolist())
+            # -1 pads the result when fewer than top_k rows qualify
+            if 0 <= idx < len(self.chunks)
+        ]
 
-        # Sort and return top_k
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_k]
+    def _search_rows(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        rows: np.ndarray
+    ) -> tuple:
+        """Exact inner-product top_k over the given FAISS rows"""
+        similarities = self.faiss_index.reconstruct_batch(rows) @ query_embedding[0]
+        order = np.argsort(-similarities, kind='stable')[:top_k]
+        return similarities[order][None], rows[order][None]
+
+    def _search_params(self, top_k: int, selector=None):
+        """FAISS search parameters matching the loaded index type"""
+        if isinstance(self.faiss_index, faiss.IndexHNSW):
+            # efSearch bounds the candidate list, so it must cover top_k
+            return faiss.SearchParametersHNSW(
+                sel=selector, efSearch=max(self.HNSW_EF_SEARCH, top_k)
+            )
+        if isinstance(self.faiss_index, faiss.IndexIVF):
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.IVF_NPROBE)
+        return faiss.SearchParameters(sel=selector)
 
     def get_stats(self) -> dict:
         """Get indexer statistics"""
@@ -485,17 +898,20 @@ class KnowledgeIndexer:
             logger.info(f"No documents found for folder {folder_path}")
             return {"removed": 0, "remaining": len(self.documents)}
 
+        old_documents = self.documents
         self.documents = remaining_docs
 
         logger.info(
             f"Removed {len(removed_docs)} documents originating from {folder_path}"
         )
 
-        # Rebuild indexes with remaining documents
-        if self.documents:
-            self.initialize_models()
+        # Rebuild indexes with remaining documents; the vector index keeps
+        # the remaining vectors instead of re-embedding them when it can
         self.bm25_engine.build_index(self.documents)
-        self._build_vector_index()
+        if not self._prune_vector_index(old_documents):
+            if self.documents:
+                self.initialize_models()
+            self._build_vector_index()
         self._save_indexes()
 
         return {"removed": len(removed_docs), "remaining": len(self.documents)}
@@ -3,8 +3,11 @@ Legal AI Service - Main Orchestrator
 Ties together all components of the legal AI system
 """
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+import copy
+import gc
 import logging
+import threading
 from datetime import datetime
 
 from backend.models.knowledge_schema import QueryResponse
@@ -54,6 +57,13 @@ class LegalAIService:
         # State
         self.is_ready = False
 
+        # get_stats() snapshot; cleared whenever the document set changes.
+        # The generation is bumped on every refresh so a snapshot built from
+        # the previous state is never stored after the refresh cleared it.
+        self._stats_cache: Optional[dict] = None
+        self._state_generation = 0
+        self._stats_lock = threading.Lock()
+
         logger.info(f"LegalAIService initialized with data_dir: {self.data_dir}")
 
     def initialize(self) -> dict:
@@ -75,7 +85,13 @@ class LegalAIService:
                 # Initialize search engines based on current documents
                 self._refresh_search_state()
 
+                # The corpus loaded at startup is long-lived; move it out of
+                # the collected generations so GC passes triggered by
+                # per-query allocations don't rescan every chunk
+                gc.freeze()
+
                 if self.is_ready:
+                    self.indexer.warmup()
                     return {
                         "status": "ready",
                         "message": "Loaded existing knowledge base",
@@ -126,6 +142,11 @@ class LegalAIService:
             self.query_agent = None
             self.is_ready = False
 
+        # Drop the stats snapshot only after the new state is in place
+        with self._stats_lock:
+            self._state_generation += 1
+            self._stats_cache = None
+
     def index_documents(
         self,
         doc_dir: Path,
@@ -248,9 +269,17 @@ class LegalAIService:
         """
         Get service statistics
 
+        The snapshot is cached until the next index/remove refreshes the
+        search state, so frequent /status polling doesn't walk the corpus.
+
         Returns:
             Dictionary with system stats
         """
+        cached = self._stats_cache
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        generation = self._state_generation
         stats = {
             "is_ready": self.is_ready,
             "data_dir": str(self.data_dir),
@@ -261,7 +290,11 @@ class LegalAIService:
             if self.hybrid_search:
                 stats["search_engine"] = self.hybrid_search.get_stats()
 
-        return stats
+        # Only cache if no refresh happened while this snapshot was built
+        with self._stats_lock:
+            if generation == self._state_generation:
+                self._stats_cache = stats
+        return copy.deepcopy(stats)
 
     def get_document_list(self) -> list:
         """
@@ -270,10 +303,19 @@ class LegalAIService:
         Returns:
             List of document summaries
         """
+        return list(self.iter_document_list())
+
+    def iter_document_list(self) -> Iterator[dict]:
+        """
+        Lazily yield indexed document summaries (see get_document_list)
+
+        Returns:
+            Iterator of document summaries
+        """
         if not self.is_ready:
-            return []
+            return iter(())
 
-        return [
+        return (
             {
                 "doc_id": doc.doc_id,
                 "title": doc.title,
@@ -287,7 +329,7 @@ class LegalAIService:
                 "indexed_at": doc.indexed_at.isoformat() if doc.indexed_at else None
             }
             for doc in self.indexer.documents
-        ]
+        )
 
     def get_document_details(self, doc_id: str) -> Optional[dict]:
         """
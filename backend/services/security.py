@@ -84,15 +84,23 @@ class EULAService:
     def __init__(self):
         self.eula_file = settings.DATA_DIR / ".eula_accepted"
         self.eula_version = settings.EULA_VERSION
+        # Acceptance can't be revoked while running, so only True is cached;
+        # a negative result is re-read so acceptance mid-session is picked up
+        self._accepted = False
 
     def is_eula_accepted(self) -> bool:
         """Check if EULA has been accepted"""
+        if self._accepted:
+            return True
+
         if not self.eula_file.exists():
             return False
 
         with open(self.eula_file, "r") as f:
             version = f.read().strip()
-            return version == self.eula_version
+
+        self._accepted = version == self.eula_version
+        return self._accepted
 
     def accept_eula(self) -> bool:
         """Mark EULA as accepted"""
@@ -100,6 +108,7 @@ class EULAService:
             settings.DATA_DIR.mkdir(parents=True, exist_ok=True)
             with open(self.eula_file, "w") as f:
                 f.write(self.eula_version)
+            self._accepted = True
             logger.info(f"EULA {self.eula_version} accepted")
             return True
         except Exception as e: